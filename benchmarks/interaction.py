@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# Controls timed on the comparison page: each is flipped through its options --repeats times
+CONTROLS = ["Shot map time period", "Shot type", "Shot map style", "Trend metric", "Candidate pool"]
+
+
+class Session:
+    # One browser session over Streamlit's websocket: sends reruns with widget values and
+    # times each until the server reports the script (or fragment) run finished
+
+    def __init__(self, ws, page):
+        self.ws = ws
+        self.page = page
+        self.values = {}
+        self.widgets = {}
+
+    async def rerun(self, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.page_name = self.page
+        msg.rerun_script.fragment_id = fragment_id
+        for widget_id, value in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = value
+
+        start = time.perf_counter()
+        await self.ws.send_bytes(msg.SerializeToString())
+        while True:
+            received = await self.ws.receive()
+            if received.type != aiohttp.WSMsgType.BINARY:
+                raise RuntimeError(f"Websocket closed: {received.type}")
+            forward = ForwardMsg()
+            forward.ParseFromString(received.data)
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                return (time.perf_counter() - start) * 1000
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                widget = element.WhichOneof("type")
+                if widget in ("selectbox", "radio"):
+                    proto = getattr(element, widget)
+                    self.widgets[proto.label] = (proto.id, list(proto.options), forward.delta.fragment_id)
+
+    def set(self, label, option):
+        widget_id, options, fragment_id = self.widgets[label]
+        self.values[widget_id] = options[option % len(options)]
+        return fragment_id
+
+
+def summary(name, times):
+    return f"{name:<28} median {statistics.median(times):7.1f} ms   max {max(times):7.1f} ms"
+
+
+async def measure(url, page, repeats):
+    async with aiohttp.ClientSession() as http:
+        async with http.ws_connect(f"{url.replace('http', 'ws', 1)}/_stcore/stream", origin=url, max_msg_size=0) as ws:
+            session = Session(ws, page)
+            await session.rerun()
+            session.set("Select Player 1", 40)
+            await session.rerun()
+            session.set("Select Player 2", 60)
+            await session.rerun()
+
+            players = []
+            for repeat in range(repeats):
+                session.set("Select Player 2", 61 + repeat)
+                players.append(await session.rerun())
+            print(summary("Player change (full rerun)", players))
+
+            for label in CONTROLS:
+                times = []
+                for repeat in range(repeats):
+                    fragment_id = session.set(label, repeat + 1)
+                    times.append(await session.rerun(fragment_id))
+                print(summary(label, times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time reruns of a running Player Comparison page end to end, as a browser sees them.")
+    parser.add_argument("--url", default="http://localhost:8501")
+    parser.add_argument("--page", default="Player_Comparison")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(measure(args.url, args.page, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.backends import SyntheticLeague
+from src.charts import create_shot_map, scatter_shotsvsxG, top10_bar
+from src.data import transform_league_data, transform_match_data, transform_shot_data
+from src.form import goals_last_5
+from src.percentiles import PercentileEngine
+from src.similarity import SimilarityEngine
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Fixed synthetic fixtures: one league season, ten seasons of one league, five leagues' worth of teams
+SIZES = {
+    "season": {"teams": 20, "seasons": ["2025"]},
+    "ten_seasons": {"teams": 20, "seasons": [str(year) for year in range(2016, 2026)]},
+    "five_leagues": {"teams": 100, "seasons": ["2025"]},
+}
+RADAR_COLUMNS = ["goals", "assists", "xG", "xA", "xG_per90", "xA_per90"]
+
+
+def build_fixture(teams, seasons):
+    league = SyntheticLeague(teams=teams, seasons=seasons, seed=0)
+    payload = pd.concat(
+        [pd.DataFrame(league.payload(f"getLeagueData/EPL/{season}")["players"]) for season in seasons],
+        ignore_index=True,
+    )
+    leaguedata = transform_league_data(payload.copy())
+    outfield = leaguedata.loc[leaguedata["main_position"] != "Goalkeeper"]
+
+    # The busiest shooter gives the worst case for the per-player paths
+    top = outfield.sort_values("shots", ascending=False).iloc[0]
+    shots = transform_shot_data(pd.DataFrame(league.payload(f"getPlayerData/{top['id']}")["shots"]))
+    team_matches = transform_match_data(
+        pd.DataFrame(league.payload(f"getTeamData/{top['current_team']}/{seasons[-1]}")["dates"])
+    )
+    return {
+        "payload": payload,
+        "leaguedata": leaguedata,
+        "outfield": outfield,
+        "shots": shots,
+        "team_matches": team_matches,
+        "pair": outfield.iloc[:2],
+    }
+
+
+def benchmarks(fixture):
+    engine = PercentileEngine(fixture["outfield"], RADAR_COLUMNS)
+    similarity = SimilarityEngine(fixture["outfield"])
+    query_id = fixture["pair"]["id"].iloc[0]
+    return {
+        "league_transform": lambda: transform_league_data(fixture["payload"].copy()),
+        "goals_last_5": lambda: goals_last_5(fixture["shots"], fixture["team_matches"]),
+        "percentile_engine_build": lambda: PercentileEngine(fixture["outfield"], RADAR_COLUMNS),
+        "percentile_vals": lambda: engine.percentiles(fixture["pair"]),
+        "similarity_build": lambda: SimilarityEngine(fixture["outfield"]),
+        "similar_players": lambda: similarity.similar(query_id, k=10),
+        "create_shot_map": lambda: create_shot_map(fixture["shots"], "All time"),
+        "create_shot_map_density": lambda: create_shot_map(fixture["shots"], "All time", style="Density"),
+        "scatter_shotsvsxG": lambda: scatter_shotsvsxG(fixture["outfield"]),
+        "top10_bar": lambda: top10_bar(fixture["outfield"]),
+    }
+
+
+def measure(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(sizes, repeats, only=None):
+    results = {}
+    for size in sizes:
+        fixture = build_fixture(**SIZES[size])
+        results[size] = {}
+        for name, fn in benchmarks(fixture).items():
+            if only and name not in only:
+                continue
+            results[size][name] = measure(fn, repeats)
+            print(f"{size:>13} {name:<24} {results[size][name]['median_ms']:>10.2f} ms {results[size][name]['peak_kb']:>11.1f} KiB", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # One row per benchmark: current vs stored time and peak memory. Times are compared
+    # on the fastest run, which is far less sensitive to machine noise than the median.
+    rows = []
+    for size, benches in results.items():
+        for name, current in benches.items():
+            stored = baseline.get(size, {}).get(name)
+            if stored is None:
+                rows.append((size, name, current["min_ms"], None, None, current["peak_kb"], None, "new"))
+                continue
+            time_ratio = current["min_ms"] / stored["min_ms"] if stored["min_ms"] else 1.0
+            memory_ratio = current["peak_kb"] / stored["peak_kb"] if stored["peak_kb"] else 1.0
+            regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+            rows.append((size, name, current["min_ms"], stored["min_ms"], time_ratio, current["peak_kb"], memory_ratio, "REGRESSION" if regressed else "ok"))
+    return rows
+
+
+def print_report(rows):
+    print(f"\n{'size':>13} {'benchmark':<24} {'min ms':>10} {'base ms':>10} {'time x':>7} {'peak KiB':>11} {'mem x':>7}  status")
+    for size, name, ms, base_ms, time_ratio, peak, memory_ratio, status in rows:
+        base = "-" if base_ms is None else f"{base_ms:.2f}"
+        time_x = "-" if time_ratio is None else f"{time_ratio:.2f}"
+        memory_x = "-" if memory_ratio is None else f"{memory_ratio:.2f}"
+        print(f"{size:>13} {name:<24} {ms:>10.2f} {base:>10} {time_x:>7} {peak:>11.1f} {memory_x:>7}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data and figure-building hot paths offline.")
+    parser.add_argument("--size", action="append", choices=sorted(SIZES), help="Fixture size (repeatable, default all)")
+    parser.add_argument("--bench", action="append", help="Only run this benchmark (repeatable)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Also write the raw results as JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, e.g. 0.25 = 25%%")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.size or list(SIZES), args.repeats, args.bench)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for size, benches in results.items():
+            baseline.setdefault(size, {}).update(benches)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    rows = compare(results, baseline, args.threshold)
+    print_report(rows)
+    if args.fail_on_regression and any(row[-1] == "REGRESSION" for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,17 @@
-import numpy as np
-import pandas as pd
 import streamlit as st
-import plotly.express as px
 
-from src.data import fetch_data
+from src.charts import in_form_bar, scatter_shotsvsxG, top10_bar
+from src.data import format_as_of, get_league_data
+from src.heatmap import HEATMAP_METRICS, ShotGrid, create_shot_heatmap
+from src.shots import get_shot_store, start_background_refresh
+from src.timing import finish_rerun, span, start_rerun
 
 st.set_page_config(
     page_title="Attacking Dashboard | PL Intelligence",
     page_icon="📊",
     layout="wide",
 )
+start_rerun("attacking_dashboard")
 
 # ---------- Shared styling ----------
 st.markdown(
@@ -149,9 +151,9 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-@st.cache_data(show_spinner=False)
-def load_league_data(year: str) -> pd.DataFrame:
-    return fetch_data(year)
+def load_league_data(year: str):
+    # Served from the process-wide stale-while-revalidate store; refreshes never block the page
+    return get_league_data(year)
 
 # ---------- Sidebar ----------
 with st.sidebar:
@@ -159,10 +161,14 @@ with st.sidebar:
     st.markdown("### Analysis filters")
 
     season_year = st.radio("Season", ["2024", "2025"], index=1)
-    leaguedata = load_league_data(season_year)
-
-    t_min = int(np.nanmin(leaguedata["time"])) if leaguedata["time"].notna().any() else 0
-    t_max = int(np.nanmax(leaguedata["time"])) if leaguedata["time"].notna().any() else 3000
+    with span("fetch"):
+        league = load_league_data(season_year)
+    leaguedata = league.data
+    start_background_refresh()
+    st.caption(f"Data as of {format_as_of(league.as_of)}")
+
+    t_min = int(leaguedata["time"].min()) if leaguedata["time"].notna().any() else 0
+    t_max = int(leaguedata["time"].max()) if leaguedata["time"].notna().any() else 3000
     default_min = max(t_min, min(int(0.6 * t_max), t_max))
 
     min_minutes = st.slider(
@@ -180,13 +186,15 @@ with st.sidebar:
     teams = sorted(leaguedata["current_team"].dropna().unique().tolist())
     sel_teams = st.multiselect("Team", teams, default=teams)
 
-mask = (
-    leaguedata["time"].notna()
-    & (leaguedata["time"] >= min_minutes)
-    & (leaguedata["main_position"].isin(sel_positions))
-    & (leaguedata["current_team"].isin(sel_teams))
-)
-df = leaguedata.loc[mask].copy()
+with span("filter"):
+    mask = (
+        leaguedata["time"].notna()
+        & (leaguedata["time"] >= min_minutes)
+        & (leaguedata["main_position"].isin(sel_positions))
+        & (leaguedata["current_team"].isin(sel_teams))
+    )
+    # The shared season frame is read-only and already carries xG_diff, so the filtered rows are used as-is
+    df = leaguedata.loc[mask]
 
 # ---------- Hero ----------
 st.markdown(
@@ -205,10 +213,10 @@ st.markdown(
 
 if df.empty:
     st.warning("No players match the selected filters. Try lowering the minutes threshold or broadening the position/team filters.")
+    finish_rerun()
     st.stop()
 
 # ---------- KPI cards ----------
-df["xG_diff"] = df["goals"] - df["xG"]
 players_count = len(df)
 teams_count = df["current_team"].nunique()
 top_xg = df.sort_values("xG", ascending=False).iloc[0]
@@ -228,88 +236,72 @@ with kpi4:
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ---------- Charts ----------
-def scatter_shotsvsxG(df, x="shots_per90", y="xG_per_shot", title="xG Per Shot vs Shots Taken Per 90"):
-    pos_colors = {
-        "Goalkeeper": "#6b7280",
-        "Defender": "#2e8467",
-        "Midfielder": "#3b5070",
-        "Forward": "#aa4242",
-    }
-
-    xlim = df[x].max() * 0.5 if df[x].notna().any() else 0
-    ylim = df[y].max() * 0.5 if df[y].notna().any() else 0
-    label_mask = (df[x] >= xlim) | (df[y] >= ylim)
-    labels = np.where(label_mask, df["last_name"], None)
-
-    fig = px.scatter(
-        df,
-        x=x,
-        y=y,
-        hover_name="player_name",
-        color="main_position",
-        color_discrete_map=pos_colors,
-        title=title,
-        height=430,
-        text=labels,
-    )
-
-    fig.update_layout(
-        template="plotly_dark",
-        showlegend=False,
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="rgba(255,255,255,0.68)"),
-        title=dict(font=dict(size=18, color="rgba(255,255,255,0.78)"), x=0.02, xanchor="left"),
-        margin=dict(l=10, r=10, t=52, b=10),
-        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False),
-        yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False),
-    )
-    fig.update_traces(textposition="top center", marker=dict(size=9, opacity=0.82, line=dict(width=0)))
-    return fig
-
-
-def top10_bar(df, metric="xG_diff", title="xG Over and Underperformers (Goals - xG)"):
-    num_players = len(df)
-    top10 = df.sort_values(by=metric, ascending=False).head(min(10, num_players // 2 + num_players % 2))
-    bottom10 = df.sort_values(by=metric, ascending=True).head(min(10, num_players // 2)).iloc[::-1]
-    plot_df = pd.concat([top10, bottom10]).copy()
-    plot_df[metric] = plot_df[metric].round(1)
-
-    fig = px.bar(
-        plot_df,
-        x=metric,
-        y="player_name",
-        orientation="h",
-        text=metric,
-        title=title,
-        height=880,
-    )
-
-    fig.update_traces(marker_line_width=0, textposition="outside")
-    fig.update_layout(
-        template="plotly_dark",
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="rgba(255,255,255,0.68)"),
-        title=dict(font=dict(size=18, color="rgba(255,255,255,0.78)"), x=0.02, xanchor="left"),
-        margin=dict(l=10, r=10, t=52, b=10),
-        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=True, zerolinecolor="rgba(255,255,255,0.22)"),
-        yaxis=dict(showgrid=False),
-    )
-    return fig
+with span("figure"):
+    volume_fig = scatter_shotsvsxG(df, "shots_per90", "xG_per_shot", "xG Per Shot vs Shots Taken Per 90")
+    threat_fig = scatter_shotsvsxG(df, "xG_per90", "xA_per90", "xA Per 90 vs xG Per 90")
+    xg_diff_fig = top10_bar(df)
 
 left_col, right_col = st.columns([3, 2], gap="large")
 
 with left_col:
     st.markdown('<div class="chart-card"><div class="section-title">Shot volume vs shot quality</div><div class="section-caption">Top-right players combine frequent shooting with strong average chance quality.</div>', unsafe_allow_html=True)
-    st.plotly_chart(scatter_shotsvsxG(df, "shots_per90", "xG_per_shot", "xG Per Shot vs Shots Taken Per 90"), use_container_width=True)
+    with span("render"):
+        st.plotly_chart(volume_fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="chart-card"><div class="section-title">Finishing threat vs creativity</div><div class="section-caption">Use this to separate pure finishers, creators and dual-threat attackers.</div>', unsafe_allow_html=True)
-    st.plotly_chart(scatter_shotsvsxG(df, "xG_per90", "xA_per90", "xA Per 90 vs xG Per 90"), use_container_width=True)
+    with span("render"):
+        st.plotly_chart(threat_fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 with right_col:
     st.markdown('<div class="chart-card"><div class="section-title">Performance against xG</div><div class="section-caption">Positive values indicate finishing above expected goals; negative values suggest underperformance.</div>', unsafe_allow_html=True)
-    st.plotly_chart(top10_bar(df), use_container_width=True)
+    with span("render"):
+        st.plotly_chart(xg_diff_fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ---------- Shot heatmap & form ----------
+# Per-player cell totals, built once per season and shot store size and shared by every session;
+# the filters only pick which rows to sum
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_shot_grid(year: str, store_size: int, _store) -> ShotGrid:
+    return ShotGrid(_store.season_shots(year))
+
+store = get_shot_store()
+heat_col, form_col = st.columns([3, 2], gap="large")
+
+with heat_col:
+    st.markdown('<div class="chart-card"><div class="section-title">Where the shots come from</div><div class="section-caption">Every shot taken by the players in view, binned on the pitch. Follows the season, minutes, position and team filters.</div>', unsafe_allow_html=True)
+    if store is None:
+        st.info("The shot heatmap needs the local shot store. Build it with `python -m src.shots`.")
+    else:
+        heatmap_metric = st.radio("Heatmap metric", HEATMAP_METRICS, horizontal=True, help="Conversion is goals per shot in each cell.")
+        with span("transform"):
+            grid = get_shot_grid(season_year, len(store), store)
+        with span("figure"):
+            heatmap_fig = create_shot_heatmap(grid, df["id"], heatmap_metric)
+        if heatmap_fig is None:
+            st.info("No shots recorded for the players in view.")
+        else:
+            with span("render"):
+                st.plotly_chart(heatmap_fig, use_container_width=True, config={"scrollZoom": False, "displayModeBar": False})
     st.markdown('</div>', unsafe_allow_html=True)
+
+with form_col:
+    st.markdown('<div class="chart-card"><div class="section-title">In-form players</div><div class="section-caption">Goals in each player\'s current team\'s last five finished matches.</div>', unsafe_allow_html=True)
+    form_table = store.form_table(season_year) if store is not None else None
+    if form_table is None:
+        st.info("Form is computed with the shot store. Build it with `python -m src.shots`.")
+    else:
+        with span("filter"):
+            in_form = df[["id", "player_name", "current_team"]].merge(form_table, left_on="id", right_index=True)
+        if in_form.empty:
+            st.info("No recent shots for the players in view.")
+        else:
+            with span("figure"):
+                form_fig = in_form_bar(in_form)
+            with span("render"):
+                st.plotly_chart(form_fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+finish_rerun()
@@ -1,16 +1,28 @@
+from datetime import date
+
 import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 
-from src.data import fetch_data, get_player_id, fetch_player_shot_data, fetch_team_match_data
+from src.artifacts import artifact_time, latest_artifact, read_percentile_engine
+from src.charts import create_shot_map, form_trend, window_start
+from src.config import LEAGUE
+from src.data import format_as_of, freeze_frame, get_league_data, get_player_id, fetch_player_shot_data_async, fetch_team_match_data_async, fetch_concurrently
+from src.percentiles import PercentileEngine
+from src.similarity import SimilarityEngine
+from src.players import PlayerIndex
+from src.resilience import CircuitOpenError
+from src.form import FORM_WINDOWS, goals_last_5
+from src.shots import get_shot_store, start_background_refresh
+from src.timing import finish_rerun, fragment_rerun, span, start_rerun
 
 st.set_page_config(
     page_title="Player Comparison | PL Intelligence",
     page_icon="🆚",
     layout="wide",
 )
+start_rerun("player_comparison")
 
 # ---------- Shared styling ----------
 st.markdown(
@@ -146,13 +158,35 @@ with st.sidebar:
     st.caption("Radar values are normalised from 0–5 against all non-goalkeepers in the selected season.")
 
 # ---------- Data loading ----------
-@st.cache_data(show_spinner=False)
-def load_league_data(year: str) -> pd.DataFrame:
-    return fetch_data(year)
+def load_league_data(year: str):
+    # Served from the process-wide stale-while-revalidate store; refreshes never block the page
+    return get_league_data(year)
+
+# Keyed by snapshot time so a background refresh gets fresh views and indexes on the next rerun.
+# Every session shares the one outfield frame. It is read-only, so no rerun can alter it and
+# none pays for a defensive copy.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_outfield_data(year: str, as_of, _league: pd.DataFrame) -> pd.DataFrame:
+    return freeze_frame(_league.loc[_league["main_position"] != "Goalkeeper"])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_player_index(year: str, as_of, _outfield: pd.DataFrame) -> PlayerIndex:
+    return PlayerIndex(_outfield)
+
+with span("fetch"):
+    league = load_league_data("2025")
+start_background_refresh()
+with span("filter"):
+    leaguedata = get_outfield_data("2025", league.as_of, league.data)
+
+with st.sidebar:
+    st.caption(f"Data as of {format_as_of(league.as_of)}")
 
-leaguedata = load_league_data("2025")
-leaguedata = leaguedata.loc[leaguedata["main_position"] != "Goalkeeper"].copy()
-players = sorted(leaguedata["player_name"].dropna().unique().tolist())
+player_index = get_player_index("2025", league.as_of, leaguedata)
+players = player_index.labels
+# Above this many names the selectors switch to a prefix search instead of one huge option list
+SELECTOR_MAX_OPTIONS = 5000
 
 # ---------- Hero ----------
 st.markdown(
@@ -170,240 +204,196 @@ st.markdown(
 )
 
 # ---------- Helpers ----------
-def goals_last_5(player_shots: pd.DataFrame, team_matches: pd.DataFrame) -> float:
-    tm = team_matches.copy()
-
-    if not {"id", "date"}.issubset(tm.columns):
-        raise ValueError("team_matches must have columns: 'id' and 'date'")
+def has_form_table(store) -> bool:
+    return store is not None and store.form_table("2025") is not None
+
+
+def resolve_players(player_names) -> pd.DataFrame:
+    # Stats for any number of players in one take from the season frame, with last-5 form
+    # joined from the league-wide table when the shot store has one (NaN otherwise)
+    labels = list(dict.fromkeys(name for name in player_names if name))
+    ids = [get_player_id(leaguedata, label, player_index) for label in labels]
+    batch = player_index.rows(leaguedata, ids).assign(label=labels)
+    store = get_shot_store()
+    if has_form_table(store):
+        batch["last5"] = store.form_table("2025")["goals_last_5"].reindex(batch["id"].astype(str)).to_numpy(dtype=float)
+    else:
+        batch["last5"] = np.nan
+    return batch
+
+
+# Contexts built from the shot store, per season snapshot and store, shared by every session.
+# The entry holds the store, so its id cannot be reused while the entry exists.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_context_cache(year: str, as_of, store_id: int, _store) -> tuple:
+    return _store, {}
+
+
+def build_player_contexts(*player_names: str) -> list:
+    # A player change only builds the new player's context; the other one is a cache hit
+    store = get_shot_store()
+    if store is None:
+        return load_player_contexts(player_names)
+    _, cached = get_context_cache("2025", league.as_of, id(store), store)
+    missing = [name for name in dict.fromkeys(player_names) if name and name not in cached]
+    if missing:
+        cached.update(zip(missing, load_player_contexts(missing)))
+    return [cached.get(player_name) if player_name else None for player_name in player_names]
+
+
+def failure_reason(error: Exception) -> str:
+    if isinstance(error, CircuitOpenError):
+        return "Understat is unavailable right now"
+    if isinstance(error, TimeoutError):
+        return "the request to Understat timed out"
+    return "the request to Understat failed"
+
+
+def load_player_contexts(player_names) -> list:
+    # Resolve every player locally first, then fan out all shot and fixture downloads at once
+    batch = resolve_players(player_names)
+
+    # Slice from the local shot store when it has been built, otherwise fall back to Understat
+    store = get_shot_store()
+    results = {}
+    calls = {}
+    for player_id, team in zip(batch["id"].astype(str), batch["current_team"].astype(str)):
+        if store is not None:
+            results[("shots", player_id)] = store.player_shots(player_id)
+            results[("matches", team)] = store.team_matches(team, "2025")
+        else:
+            calls[("shots", player_id)] = (fetch_player_shot_data_async, player_id)
+            calls[("matches", team)] = (fetch_team_match_data_async, team, 2025)
+    with span("fetch"):
+        fetched, failures = fetch_concurrently(calls)
+        results.update(fetched)
+    labels = dict(zip(batch["id"].astype(str), batch["label"]))
+    for (kind, key), error in failures.items():
+        if kind == "shots":
+            st.warning(f"Couldn't load {labels[key]}'s shots: {failure_reason(error)}. The shot map stays empty until they load.")
+        else:
+            st.warning(f"Couldn't load {key}'s fixtures: {failure_reason(error)}. Goals in the last 5 games is unavailable.")
+
+    contexts = {}
+    for position, (label, player_id, team) in enumerate(zip(batch["label"], batch["id"].astype(str), batch["current_team"].astype(str))):
+        stats = batch.iloc[[position]]
+        shots = results.get(("shots", player_id))
+        team_matches = results.get(("matches", team))
+
+        if shots is None:
+            shots = pd.DataFrame()
+        last5 = batch["last5"].iloc[position]
+        if not has_form_table(store) and not shots.empty and team_matches is not None:
+            with span("transform"):
+                last5 = goals_last_5(shots, team_matches)
+
+        contexts[label] = {
+            "id": player_id,
+            "name": stats["player_name"].values[0],
+            "team": team,
+            "stats": stats,
+            "last5": last5,
+            "shots" : shots,
+        }
 
-    tm["date"] = pd.to_datetime(tm["date"], errors="coerce")
-    if "forecast" in tm.columns:
-        tm = tm[tm["forecast"].notna()].copy()
+    return [contexts.get(player_name) if player_name else None for player_name in player_names]
 
-    last5_ids = (
-        tm.sort_values("date", ascending=False)
-        .drop_duplicates(subset="id", keep="first")
-        .head(5)["id"]
-        .tolist()
-    )
-    
-    if len(last5_ids) < 5:
-        return np.nan
-    else:
-        last5_ids = pd.DataFrame(last5_ids, columns=["match_id"])
 
-    ps = player_shots.copy()
-    if "date" not in ps:
-        raise ValueError("Expected a 'date' column in player_shots")
-    
-    ps["date"] = pd.to_datetime(ps["date"], errors="coerce")
+def shots_version(shots: pd.DataFrame) -> tuple:
+    # Changes whenever a player's shots are refreshed, without hashing the frame
+    if shots.empty:
+        return (0, None)
+    return (len(shots), shots["id"].iloc[-1], shots["date"].max())
 
-    if "is_goal" not in ps:
-        if "result" in ps:
-            ps["is_goal"] = ps["result"].astype(str).str.lower().eq("goal").astype(int)
-        else:
-            raise ValueError("Need either 'is_goal' or 'result' column")
 
-    if "match_id" not in ps:
-        raise ValueError("Expected a 'match_id' column to group by matches")
+def career_contexts(*contexts) -> list:
+    # The shot store only holds the EPL seasons in SHOT_STORE_SEASONS, so "All time" fetches each
+    # player's full Understat career (every league); the stored seasons stand in if that fails
+    if get_shot_store() is None:
+        return list(contexts)
+    calls = {("shots", ctx["id"]): (fetch_player_shot_data_async, ctx["id"]) for ctx in contexts if ctx}
+    with span("fetch"):
+        results, failures = fetch_concurrently(calls)
 
-    per_match = (
-        ps.groupby("match_id")
-        .agg(goals=("is_goal", "sum"), match_date=("date", "max"))
-        .reset_index()
-        .sort_values("match_date")
-    )
+    careers = []
+    for ctx in contexts:
+        shots = results.get(("shots", ctx["id"])) if ctx else None
+        if ctx and ("shots", ctx["id"]) in failures:
+            st.warning(f"Couldn't load {ctx['name']}'s full career: {failure_reason(failures[('shots', ctx['id'])])}. Showing the stored seasons only.")
+        careers.append(ctx if shots is None else dict(ctx, shots=shots))
+    return careers
 
-    last5 = last5_ids.merge(per_match)
 
-    return int(sum(last5["goals"])) if not last5.empty else np.nan
+def window_contexts(time_window: str, *contexts) -> list:
+    # "Last N months" maps are cut from the date-sorted shot store by binary search instead of
+    # masking each player's full history
+    store = get_shot_store()
+    start = window_start(time_window, date.today())
+    if store is None or start is None:
+        return list(contexts)
+    return [ctx and dict(ctx, shots=store.player_shots(ctx["id"], since=start)) for ctx in contexts]
 
 
+# Rendered shot maps are shared by every session, so flipping filters back and forth is a cache hit
+@st.cache_resource(show_spinner=False, max_entries=256)
+def get_shot_map(player_id: str, time_window: str, shot_type: str, style: str, version: tuple, today, _shots: pd.DataFrame):
+    return create_shot_map(_shots, time_window, shot_type, today=today, style=style)
 
-def build_player_context(player_name: str):
-    if not player_name:
-        return None
 
-    player_id = get_player_id(leaguedata, player_name)
-    stats = leaguedata[leaguedata["id"] == player_id]
-    team = stats["current_team"].values[0]
-    shots = fetch_player_shot_data(player_id)
-    team_matches = fetch_team_match_data(team, 2025)
+def count_or_na(value):
+    # Counts are nullable: Understat rows with a missing or invalid value show N/A, not 0
+    return "N/A" if pd.isna(value) else int(value)
 
-    if shots.empty:
-        last5 = np.nan
-    else:
-        last5 = goals_last_5(shots, team_matches)
 
-    return {
-        "id": player_id,
-        "name": stats["player_name"].values[0],
-        "team": team,
-        "stats": stats,
-        "last5": last5,
-        "shots" : shots,
-    }
+def counts_or_na(values: pd.Series) -> np.ndarray:
+    return np.where(values.isna(), "N/A", values.fillna(0).astype(int).astype(str))
 
 
 def player_kpi(ctx: dict) -> pd.DataFrame:
     stats = ctx["stats"]
     last5 = ctx["last5"]
     return pd.DataFrame({
-        "Goals": [int(stats["goals"].values[0])],
-        "Assists": [int(stats["assists"].values[0])],
-        "Goals (non-penalty)": [int(stats["npg"].values[0])],
+        "Goals": [count_or_na(stats["goals"].values[0])],
+        "Assists": [count_or_na(stats["assists"].values[0])],
+        "Goals (non-penalty)": [count_or_na(stats["npg"].values[0])],
         "xG": [round(stats["xG"].values[0], 2)],
         "xA": [round(stats["xA"].values[0], 2)],
-        "Goals Last 5 Games (Current Team)": ["N/A" if pd.isna(last5) else int(last5)],
-        "Minutes Played": [int(stats["time"].values[0])],
+        "Goals Last 5 Games (Current Team)": [count_or_na(last5)],
+        "Minutes Played": [count_or_na(stats["time"].values[0])],
         "xG/90": [round(stats["xG_per90"].values[0], 2)],
         "xA/90": [round(stats["xA_per90"].values[0], 2)],
         "KP/90": [round(stats["KP_per90"].values[0], 2)]
     })
 
 
-def create_shot_map(shots: pd.DataFrame, time_window: str = "All time"):
-    if shots.empty:
-        return None
-
-    pitch_length = 95
-    pitch_width = 60
-
-    shots = shots.copy()
-    shots["date"] = pd.to_datetime(shots["date"], errors="coerce")
-
-    if time_window == "Last 6 months":
-        cutoff_date = pd.Timestamp.today() - pd.DateOffset(months=6)
-        shots = shots[shots["date"] >= cutoff_date].copy()
-
-    elif time_window == "Last 12 months":
-        cutoff_date = pd.Timestamp.today() - pd.DateOffset(months=12)
-        shots = shots[shots["date"] >= cutoff_date].copy()
-    
-    if shot_type == "Open play":
-        shots = shots[shots["situation"] == "OpenPlay"].copy()
-
-    if shots.empty:
-        return None
-
-    shots["open/set play"] = np.where(
-        shots["situation"].isin(["DirectFreekick", "Penalty"]),
-        "set-piece",
-        "open-play"
-    )
-
-    shotsmap = shots.copy()
-    shotsmap["x"] = shotsmap["X"] * pitch_length
-    shotsmap["y"] = pitch_width - shotsmap["Y"] * pitch_width
-
-    fig = px.scatter(
-        shotsmap,
-        x="y",
-        y="x",
-        size="xG",
-        size_max=10,
-        hover_data=["xG", "shotType", "minute", "date"],
-    )
-
-    fig.update_xaxes(range=[0, 60])
-    fig.update_yaxes(range=[60, 95], scaleanchor="x", scaleratio=1)
-
-    box_depth = 16.5
-    box_width = 40.3
-    box_left = (pitch_width - box_width) / 2
-    box_right = (pitch_width + box_width) / 2
-
-    fig.add_shape(
-        type="rect",
-        x0=box_left,
-        x1=box_right,
-        y0=pitch_length - box_depth,
-        y1=pitch_length,
-        line=dict(color="white", width=2)
-    )
-
-    six_yard_depth = 5.5
-    six_yard_width = 18.3
-    six_left = (pitch_width - six_yard_width) / 2
-    six_right = (pitch_width + six_yard_width) / 2
-
-    fig.add_shape(
-        type="rect",
-        x0=six_left,
-        x1=six_right,
-        y0=pitch_length - six_yard_depth,
-        y1=pitch_length,
-        line=dict(color="white", width=2)
-    )
-
-    penalty_spot_x = pitch_width / 2
-    penalty_spot_y = pitch_length - 11
-    arc_radius = 9.15
-
-    theta = np.linspace(0, 2 * np.pi, 300)
-    arc_x = penalty_spot_x + arc_radius * np.cos(theta)
-    arc_y = penalty_spot_y + arc_radius * np.sin(theta)
-
-    box_line_y = pitch_length - 16.5
-    mask = arc_y < box_line_y
-
-    fig.add_trace(
-        go.Scatter(
-            x=arc_x[mask],
-            y=arc_y[mask],
-            mode="lines",
-            line=dict(color="white", width=2),
-            showlegend=False,
-            hoverinfo="skip"
-        )
-    )
-
-    fig.update_layout(
-        width=420,
-        height=350,
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=0, r=0, t=40, b=0),
-        showlegend=False,
-        xaxis_title=None,
-        yaxis_title=None,
-        )
-    
-    fig.update_xaxes(showgrid=False, showticklabels=False, zeroline=False, visible=False)
-
-    fig.update_yaxes(
-        showgrid=False,
-        showticklabels=False,
-        zeroline=False,
-        visible=False,
-        scaleanchor="x",
-        scaleratio=1
-    )
-
-    fig.add_shape(
-        type="rect",
-        x0=0,
-        x1=pitch_width,
-        y0=60,
-        y1=pitch_length,
-        line=dict(color="white", width=2)
-    )
-
-
-    return fig
-
 # ---------- Selectors ----------
-st.markdown('<div class="selector-card"><div class="section-title">Choose two players</div><div class="section-caption">Select any two outfield players from the 2025 Premier League dataset.</div>', unsafe_allow_html=True)
-left_select, right_select = st.columns([1, 1], gap="large")
-with left_select:
-    player1_name = st.selectbox("Select Player 1", players, index=None, placeholder="Player")
-with right_select:
-    player2_name = st.selectbox("Select Player 2", players, index=None, placeholder="Player")
+def player_selector(label: str, key: str):
+    options = players
+    if len(players) > SELECTOR_MAX_OPTIONS:
+        query = st.text_input(f"Search {label.lower()}", key=f"{key}_search", placeholder="Start typing a name")
+        options = player_index.search(query, limit=200)
+    return st.selectbox(label, options, index=None, placeholder="Player", key=key)
+
+SHORTLIST_MAX = 10
+COMPARISON_MODES = ["Head to head", f"Shortlist (up to {SHORTLIST_MAX})"]
+
+comparison_mode = st.radio("Comparison mode", COMPARISON_MODES, horizontal=True)
+shortlist_mode = comparison_mode == COMPARISON_MODES[1]
+
+if shortlist_mode:
+    st.markdown(f'<div class="selector-card"><div class="section-title">Build a shortlist</div><div class="section-caption">Select up to {SHORTLIST_MAX} outfield players from the 2025 Premier League dataset.</div>', unsafe_allow_html=True)
+    shortlist_names = st.multiselect("Shortlist", players, max_selections=SHORTLIST_MAX, placeholder="Add players", key="shortlist")
+    player1_name = player2_name = None
+else:
+    st.markdown('<div class="selector-card"><div class="section-title">Choose two players</div><div class="section-caption">Select any two outfield players from the 2025 Premier League dataset.</div>', unsafe_allow_html=True)
+    left_select, right_select = st.columns([1, 1], gap="large")
+    with left_select:
+        player1_name = player_selector("Select Player 1", "player1")
+    with right_select:
+        player2_name = player_selector("Select Player 2", "player2")
 st.markdown('</div>', unsafe_allow_html=True)
 
-player1_ctx = build_player_context(player1_name) if player1_name else None
-player2_ctx = build_player_context(player2_name) if player2_name else None
+player1_ctx, player2_ctx = build_player_contexts(player1_name, player2_name)
 
 if player1_ctx and player2_ctx:
     st.markdown(
@@ -427,58 +417,107 @@ label_to_col = {
     "KP/90": "KP_per90",
 }
 
-mins = pd.Series({lbl: pd.to_numeric(leaguedata[label_to_col[lbl]], errors="coerce").min() for lbl in radar_labels})
-maxs = pd.Series({lbl: pd.to_numeric(leaguedata[label_to_col[lbl]], errors="coerce").max() for lbl in radar_labels})
-denom = (maxs - mins).replace(0, np.nan)
-SCALE = 5
 
+# Built once per season snapshot and shared by every session
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_percentile_engine(year: str, as_of, _outfield: pd.DataFrame) -> PercentileEngine:
+    # The season was loaded from a prebuilt artifact: memory-map its sorted arrays instead
+    artifact = latest_artifact(LEAGUE, year)
+    if artifact is not None and artifact_time(artifact) == as_of:
+        return read_percentile_engine(artifact)
+    return PercentileEngine(_outfield, list(label_to_col.values()), group_col="main_position")
 
-def percentile_vals(player_stats_row: pd.Series, reference_df: pd.DataFrame) -> list[float]:
-    vals = []
 
-    for lbl in radar_labels:
-        col = label_to_col[lbl]
+def percentile_vals(stats_rows: pd.DataFrame) -> list[list[float]]:
+    cols = [label_to_col[lbl] for lbl in radar_labels]
+    return get_percentile_engine("2025", league.as_of, leaguedata).percentiles(stats_rows, cols).values.tolist()
+
+def radar_figure(names: list, values: list) -> go.Figure:
+    fig = go.Figure()
+    for name, vals in zip(names, values):
+        fig.add_trace(go.Scatterpolar(r=vals, theta=radar_labels, fill="toself", name=name))
+    fig.update_layout(
+        template="plotly_dark",
+        showlegend=True,
+        margin=dict(l=0, r=0, t=10, b=0),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="rgba(255,255,255,0.68)"),
+        legend=dict(
+            title=dict(text="Players", font=dict(color="rgba(255,255,255,0.64)")),
+            font=dict(color="rgba(255,255,255,0.68)")
+        ),
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100],
+                tickvals=[0, 25, 50, 75, 100]
+            )
+        ),
+        height=560
+        )
+    return fig
+
+
+def shortlist_kpis(shortlist: pd.DataFrame) -> pd.DataFrame:
+    # Same metrics as the head-to-head table, one row per player, built column-wise
+    last5 = shortlist["last5"]
+    return pd.DataFrame({
+        "Player": shortlist["label"].to_numpy(),
+        "Team": shortlist["current_team"].astype(str).to_numpy(),
+        "Goals": counts_or_na(shortlist["goals"]),
+        "Assists": counts_or_na(shortlist["assists"]),
+        "Goals (non-penalty)": counts_or_na(shortlist["npg"]),
+        "xG": shortlist["xG"].round(2).to_numpy(),
+        "xA": shortlist["xA"].round(2).to_numpy(),
+        "Goals Last 5 Games (Current Team)": counts_or_na(last5),
+        "Minutes Played": counts_or_na(shortlist["time"]),
+        "xG/90": shortlist["xG_per90"].round(2).to_numpy(),
+        "xA/90": shortlist["xA_per90"].round(2).to_numpy(),
+        "KP/90": shortlist["KP_per90"].round(2).to_numpy(),
+    })
 
-        reference = pd.to_numeric(reference_df[col], errors="coerce").dropna()
-        player_value = float(player_stats_row[col])
 
-        percentile = (reference < player_value).mean() * 100
-        vals.append(round(percentile, 1))
+# ---------- Shortlist ----------
+if shortlist_mode:
+    if len(shortlist_names) < 2:
+        st.info("Add at least two players to compare.")
+        finish_rerun()
+        st.stop()
 
-    return vals
+    shortlist = resolve_players(shortlist_names)
+    if not has_form_table(get_shot_store()):
+        # Without the league form table, last-5 goals need every player's shots and fixtures
+        shortlist["last5"] = [ctx["last5"] for ctx in build_player_contexts(*shortlist["label"])]
+
+    st.markdown('<div class="chart-card"><div class="section-title">Radar profile</div><div class="section-caption">Each stat is presented as a percentile across all league players.</div>', unsafe_allow_html=True)
+    with span("percentile"):
+        shortlist_vals = percentile_vals(shortlist)
+    with span("figure"):
+        fig = radar_figure(shortlist["label"].tolist(), shortlist_vals)
+    with span("render"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="chart-card"><div class="section-title">Key Stats</div></div>', unsafe_allow_html=True)
+    with span("render"):
+        st.dataframe(shortlist_kpis(shortlist), hide_index=True, use_container_width=True)
+
+    finish_rerun()
+    st.stop()
 
 col_radar, col_table = st.columns([3, 2], gap="large")
 
 with col_radar:
     st.markdown('<div class="chart-card"><div class="section-title">Radar profile</div><div class="section-caption">Each stat is presented as a percentile across all league players.</div>', unsafe_allow_html=True)
     if player1_ctx and player2_ctx:
-        p1_vals = percentile_vals(player1_ctx["stats"].squeeze(), leaguedata)
-        p2_vals = percentile_vals(player2_ctx["stats"].squeeze(), leaguedata)
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatterpolar(r=p1_vals, theta=radar_labels, fill="toself", name=player1_ctx["name"]))
-        fig.add_trace(go.Scatterpolar(r=p2_vals, theta=radar_labels, fill="toself", name=player2_ctx["name"]))
-        fig.update_layout(
-            template="plotly_dark",
-            showlegend=True,
-            margin=dict(l=0, r=0, t=10, b=0),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="rgba(255,255,255,0.68)"),
-            legend=dict(
-                title=dict(text="Players", font=dict(color="rgba(255,255,255,0.64)")),
-                font=dict(color="rgba(255,255,255,0.68)")
-            ),
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 100],
-                    tickvals=[0, 25, 50, 75, 100]
-                )
-            ),
-            height=560
-            )
-        st.plotly_chart(fig, use_container_width=True)
+        with span("percentile"):
+            p1_vals, p2_vals = percentile_vals(pd.concat([player1_ctx["stats"], player2_ctx["stats"]]))
+
+        with span("figure"):
+            fig = radar_figure([player1_ctx["name"], player2_ctx["name"]], [p1_vals, p2_vals])
+        with span("render"):
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Select two players to compare.")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -509,13 +548,13 @@ with col_table:
 
         # Player 1 column
         tbl[p1_name] = [
-            str(int(v)) if m in int_metrics else f"{float(v):.2f}"
+            v if isinstance(v, str) else str(int(v)) if m in int_metrics else f"{float(v):.2f}"
             for m, v in zip(tbl["Metric"], tbl[p1_name])
         ]
 
         # Player 2 column
         tbl[p2_name] = [
-            str(int(v)) if m in int_metrics else f"{float(v):.2f}"
+            v if isinstance(v, str) else str(int(v)) if m in int_metrics else f"{float(v):.2f}"
             for m, v in zip(tbl["Metric"], tbl[p2_name])
         ]
 
@@ -584,8 +623,9 @@ with col_table:
             </div>
             """
 
-        st.markdown(
-            f"""
+        with span("render"):
+            st.markdown(
+                f"""
             <div style="padding: 0.7rem 0.2rem 0.2rem 0.2rem;">
                 <div style="
                     display:grid;
@@ -605,8 +645,8 @@ with col_table:
                 {rows_html}
             </div>
             """,
-            unsafe_allow_html=True
-        )
+                unsafe_allow_html=True
+            )
 
 
     else:
@@ -615,63 +655,179 @@ with col_table:
 
 
 
-radio_col1, radio_col2, radio_col3 = st.columns([3, 2, 3], gap="large")
+# ---------- Shot maps ----------
+# Fragments: the shot map, form trend and similar players controls rerun only their own
+# section, reusing the player contexts, radar and stats table from the last full rerun
+@st.fragment
+def shot_map_section(player1_ctx, player2_ctx):
+    with fragment_rerun("player_comparison", "shot_maps"):
+        radio_col1, radio_col2, radio_col3 = st.columns([3, 2, 3], gap="large")
+
+        with radio_col1:
+            st.markdown("<div style='height: 0.8rem;'></div>", unsafe_allow_html=True)
+            shot_time_window = st.radio(
+                "Shot map time period",
+                ["Last 6 months", "Last 12 months", "All time"],
+                horizontal=True
+            )
 
-with radio_col1:
-    st.markdown("<div style='height: 0.8rem;'></div>", unsafe_allow_html=True)
-    shot_time_window = st.radio(
-        "Shot map time period",
-        ["Last 6 months", "Last 12 months", "All time"],
-        horizontal=True
-    )
+        with radio_col2:
+            st.markdown("<div style='height: 0.8rem;'></div>", unsafe_allow_html=True)
+            shot_type = st.radio(
+                "Shot type",
+                ["All shots", "Open play"],
+                horizontal=True
+            )
 
-with radio_col2:
-    st.markdown("<div style='height: 0.8rem;'></div>", unsafe_allow_html=True)
-    shot_type = st.radio(
-        "Shot type",
-        ["All shots", "Open play"],
-        horizontal=True
-    )
+        with radio_col3:
+            st.markdown("<div style='height: 0.8rem;'></div>", unsafe_allow_html=True)
+            shot_map_style = st.radio(
+                "Shot map style",
+                ["Shots", "Density"],
+                horizontal=True,
+                help="Density bins shots into a grid coloured by count, which stays fast for long careers.",
+            )
 
+        if shot_time_window == "All time" and player1_ctx and player2_ctx:
+            player1_ctx, player2_ctx = career_contexts(player1_ctx, player2_ctx)
+        else:
+            player1_ctx, player2_ctx = window_contexts(shot_time_window, player1_ctx, player2_ctx)
 
-# ---------- Shot maps ----------
-shot_col1, shot_col2 = st.columns([1, 1], gap="large")
+        shot_col1, shot_col2 = st.columns([1, 1], gap="large")
 
-with shot_col1:
-    
-    if player1_ctx and player2_ctx:
-        st.markdown(
-        f'<div class="chart-card"><div class="section-title">{player1_ctx["name"]} Shot Map',
-        unsafe_allow_html=True
-        )
+        with shot_col1:
+            if player1_ctx and player2_ctx:
+                st.markdown(
+                f'<div class="chart-card"><div class="section-title">{player1_ctx["name"]} Shot Map',
+                unsafe_allow_html=True
+                )
+
+                with span("figure"):
+                    fig1 = get_shot_map(player1_ctx["id"], shot_time_window, shot_type, shot_map_style, shots_version(player1_ctx["shots"]), date.today(), player1_ctx["shots"])
+
+                if fig1 is not None:
+                    with span("render"):
+                        st.plotly_chart(fig1, use_container_width=True, config={"scrollZoom": False, "displayModeBar": False})
+                else:
+                    st.info("No shot data available for this player.")
+            else:
+                st.info("Select Player 1 to view shot map.")
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        with shot_col2:
+            if player2_ctx and player1_ctx:
+                st.markdown(
+                f'<div class="chart-card"><div class="section-title">{player2_ctx["name"]} Shot Map</div></div>',
+                unsafe_allow_html=True
+                )
+                with span("figure"):
+                    fig2 = get_shot_map(player2_ctx["id"], shot_time_window, shot_type, shot_map_style, shots_version(player2_ctx["shots"]), date.today(), player2_ctx["shots"])
+
+                if fig2 is not None:
+                    with span("render"):
+                        st.plotly_chart(fig2, use_container_width=True, config={"scrollZoom": False, "displayModeBar": False})
+                else:
+                    st.info("No shot data available for this player.")
+            else:
+                st.info("Select Player 2 to view shot map.")
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+
+shot_map_section(player1_ctx, player2_ctx)
+
+
+# ---------- Form trend ----------
+trend_metrics = {"xG": "xG", "Goals": "goals", "Shots": "shots", "xA": "xA"}
 
-        fig1 = create_shot_map(player1_ctx["shots"],shot_time_window)
+@st.fragment
+def form_trend_section(player1_ctx, player2_ctx):
+    with fragment_rerun("player_comparison", "form_trend"):
+        st.markdown('<div class="chart-card"><div class="section-title">Form trend</div><div class="section-caption">Rolling average per match over each player\'s current team\'s fixtures this season.</div>', unsafe_allow_html=True)
+        trend_col1, trend_col2 = st.columns([3, 2], gap="large")
+        with trend_col1:
+            trend_label = st.radio("Trend metric", list(trend_metrics), horizontal=True)
+        with trend_col2:
+            trend_window = st.radio("Rolling window", FORM_WINDOWS, index=1, horizontal=True, format_func=lambda n: f"Last {n} matches")
 
-        if fig1 is not None:
-            st.plotly_chart(fig1, use_container_width=True, config={"scrollZoom": False, "displayModeBar": False})
+        store = get_shot_store()
+        if not (player1_ctx and player2_ctx):
+            st.info("Select two players to compare their form.")
+        elif store is None or store.form_series(player1_ctx["id"], "2025") is None:
+            st.info("Form trends are built with the shot store. Build it with `python -m src.shots`.")
         else:
-            st.info("No shot data available for this player.")
-    else:
-        st.info("Select Player 1 to view shot map.")
+            trend_series = {ctx["name"]: store.form_series(ctx["id"], "2025") for ctx in [player1_ctx, player2_ctx]}
+            with span("figure"):
+                trend_fig = form_trend(trend_series, trend_metrics[trend_label], trend_label, trend_window)
+            with span("render"):
+                st.plotly_chart(trend_fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
 
-with shot_col2:
-    
+form_trend_section(player1_ctx, player2_ctx)
+
+
+# ---------- Similar players ----------
+SIMILAR_SEASONS = {"This season": ("2025",), "2024/25 and 2025/26": ("2024", "2025")}
+SIMILAR_MIN_MINUTES = 450
 
-    if player2_ctx and player1_ctx:
-        st.markdown(
-        f'<div class="chart-card"><div class="section-title">{player2_ctx["name"]} Shot Map</div></div>',
-        unsafe_allow_html=True
-        )
-        fig2 = create_shot_map(player2_ctx["shots"], shot_time_window)
 
-        if fig2 is not None:
-            st.plotly_chart(fig2, use_container_width=True, config={"scrollZoom": False, "displayModeBar": False})
-            
+# One engine per candidate pool and set of snapshots, shared by every session
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_similarity_engine(seasons: tuple, as_of: tuple, _leagues: tuple) -> SimilarityEngine:
+    candidates = pd.concat([data.assign(season=season) for season, data in zip(seasons, _leagues)], ignore_index=True)
+    candidates = candidates.loc[candidates["main_position"] != "Goalkeeper"]
+    return SimilarityEngine(candidates, min_minutes=SIMILAR_MIN_MINUTES)
+
+
+def similar_table(engine: SimilarityEngine, ctx: dict, same_position: bool) -> pd.DataFrame:
+    similar = engine.similar(ctx["id"], "2025", k=5, same_position=same_position)
+    return pd.DataFrame({
+        "Player": similar["player_name"].astype(str).to_numpy(),
+        "Team": similar["current_team"].astype(str).to_numpy(),
+        "Season": similar["season"].to_numpy(),
+        "Position": similar["main_position"].astype(str).to_numpy(),
+        "Similarity": similar["similarity"].to_numpy(),
+    })
+
+
+@st.fragment
+def similar_players_section(player1_ctx, player2_ctx):
+    with fragment_rerun("player_comparison", "similar_players"):
+        st.markdown('<div class="chart-card"><div class="section-title">Similar players</div><div class="section-caption">Closest per-90 profiles (xG, xA, key passes, shots, shot quality, goals and assists), standardised across all outfield players with at least 450 minutes.</div>', unsafe_allow_html=True)
+        pool_col, position_col = st.columns([3, 2], gap="large")
+        with pool_col:
+            similar_pool = st.radio("Candidate pool", list(SIMILAR_SEASONS), horizontal=True)
+        with position_col:
+            same_position = st.checkbox("Same position only", value=True)
+
+        if player1_ctx and player2_ctx:
+            pool_seasons = SIMILAR_SEASONS[similar_pool]
+            with span("fetch"):
+                pool = [league if season == "2025" else load_league_data(season) for season in pool_seasons]
+            with span("transform"):
+                engine = get_similarity_engine(pool_seasons, tuple(snapshot.as_of for snapshot in pool), tuple(snapshot.data for snapshot in pool))
+            similar_col1, similar_col2 = st.columns([1, 1], gap="large")
+            for column, ctx in [(similar_col1, player1_ctx), (similar_col2, player2_ctx)]:
+                with column:
+                    st.markdown(f"**Plays like {ctx['name']}**")
+                    table = similar_table(engine, ctx, same_position)
+                    if table.empty:
+                        st.info(f"{ctx['name']} has too few minutes for a similarity profile.")
+                    else:
+                        with span("render"):
+                            st.dataframe(
+                                table,
+                                hide_index=True,
+                                use_container_width=True,
+                                column_config={"Similarity": st.column_config.ProgressColumn("Similarity", min_value=0, max_value=100, format="%.1f")},
+                            )
         else:
-            st.info("No shot data available for this player.")
-    else:
-        st.info("Select Player 2 to view shot map.")
+            st.info("Select two players to find similar profiles.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+similar_players_section(player1_ctx, player2_ctx)
 
-    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+finish_rerun()
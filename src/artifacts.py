@@ -0,0 +1,133 @@
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow.feather as feather
+
+from src.config import ARTIFACT_DIR, ARTIFACT_KEEP
+from src.percentiles import PercentileEngine
+from src.store import TIMESTAMP_FORMAT
+
+# Bumped whenever the layout below changes; older artifacts are then ignored
+ARTIFACT_FORMAT = 1
+FRAMES = ["players", "shots", "matches", "form", "series"]
+ALL_PLAYERS = "_all"
+
+# Layout: {ARTIFACT_DIR}/{league}/{season}/{version}/
+#   manifest.json
+#   players.arrow, shots.arrow, ...       uncompressed Arrow IPC (Feather v2)
+#   percentiles/{_all|group}/{metric}.npy sorted reference arrays
+# {season}/CURRENT names the version the app should load. A version is the build time, with a
+# -NNN suffix when several builds of the season finish within the same second.
+
+
+def artifact_root(league, season):
+    return Path(ARTIFACT_DIR) / league / str(season)
+
+
+def artifact_time(path):
+    stamp = Path(path).name.split("-", 1)[0]
+    return datetime.strptime(stamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def latest_artifact(league, season):
+    current = artifact_root(league, season) / "CURRENT"
+    if not current.exists():
+        return None
+    path = current.parent / current.read_text().strip()
+    if not (path / "manifest.json").exists() or read_manifest(path).get("format") != ARTIFACT_FORMAT:
+        return None
+    return path
+
+
+def read_manifest(path):
+    return json.loads((Path(path) / "manifest.json").read_text())
+
+
+def read_frame(path, name):
+    # Memory-mapped: numeric and string columns stay backed by the page cache, so every worker
+    # process on the host shares one copy. The arrays are read-only; copy before mutating.
+    file = Path(path) / f"{name}.arrow"
+    if not file.exists():
+        return None
+    return feather.read_table(file, memory_map=True).to_pandas(split_blocks=True)
+
+
+def read_percentile_engine(path):
+    manifest = read_manifest(path)
+    directory = Path(path) / "percentiles"
+    metrics = manifest["percentile_metrics"]
+
+    def arrays(group):
+        return {metric: np.load(directory / group / f"{metric}.npy", mmap_mode="r") for metric in metrics}
+
+    return PercentileEngine.from_sorted(
+        metrics,
+        arrays(ALL_PLAYERS),
+        {group: arrays(group) for group in manifest["percentile_groups"]},
+        group_col=manifest["percentile_group_col"],
+    )
+
+
+def write_artifact(league, season, frames, percentiles):
+    # Built in a hidden staging directory and renamed into place, then CURRENT is swapped,
+    # so a reader only ever sees complete versions
+    root = artifact_root(league, season)
+    root.mkdir(parents=True, exist_ok=True)
+    built_at = datetime.now(timezone.utc)
+    stamp = built_at.strftime(TIMESTAMP_FORMAT)
+    staging = Path(tempfile.mkdtemp(prefix=f".{stamp}.", suffix=".tmp", dir=root))
+    staging.chmod(0o755)
+
+    rows = {}
+    for name, frame in frames.items():
+        if frame is None:
+            continue
+        feather.write_feather(frame.reset_index(drop=True), staging / f"{name}.arrow", compression="uncompressed")
+        rows[name] = len(frame)
+
+    sorted_values, group_sorted = percentiles.sorted_arrays()
+    for group, arrays in [(ALL_PLAYERS, sorted_values)] + list(group_sorted.items()):
+        (staging / "percentiles" / str(group)).mkdir(parents=True)
+        for metric, values in arrays.items():
+            np.save(staging / "percentiles" / str(group) / f"{metric}.npy", np.asarray(values))
+
+    # Renaming onto an existing (non-empty) version fails, so concurrent builds never overwrite each other
+    version, attempt = stamp, 0
+    while True:
+        path = root / version
+        try:
+            staging.rename(path)
+            break
+        except OSError:
+            if not path.exists():
+                raise
+            attempt += 1
+            version = f"{stamp}-{attempt:03d}"
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "league": league,
+        "season": str(season),
+        "version": version,
+        "built_at": built_at.isoformat(),
+        "rows": rows,
+        "percentile_metrics": percentiles.metrics,
+        "percentile_groups": [str(group) for group in group_sorted],
+        "percentile_group_col": percentiles.group_col,
+    }
+    (path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    pointer = root / f"CURRENT.{version}.tmp"
+    pointer.write_text(version)
+    pointer.replace(root / "CURRENT")
+
+    # Old versions can go even while another process still has them mapped: on POSIX the
+    # pages stay valid until that process unmaps them
+    versions = sorted((p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")), reverse=True)
+    for old in versions[ARTIFACT_KEEP:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return path
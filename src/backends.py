@@ -0,0 +1,323 @@
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    CURRENT_SEASON,
+    RECORDING_DIR,
+    REPLAY_LATENCY,
+    REPLAY_SYNTHETIC,
+    SHOT_STORE_SEASONS,
+    SYNTHETIC_SHOTS_PER_MATCH,
+    SYNTHETIC_SQUAD_SIZE,
+    SYNTHETIC_TEAMS,
+    UNDERSTAT_BACKEND,
+)
+from src.fake_client import FakeUnderstatClient
+from src.understat import UnderstatClient
+
+
+def recording_path(directory, endpoint):
+    return Path(directory) / f"{quote(endpoint, safe='')}.json"
+
+
+class RecordingClient(UnderstatClient):
+    # Passes requests through to the live client and saves each raw response to disk
+
+    def __init__(self, inner, directory=RECORDING_DIR):
+        self.inner = inner
+        self.directory = Path(directory)
+
+    async def get_json(self, endpoint):
+        data = await self.inner.get_json(endpoint)
+        path = recording_path(self.directory, endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(data))
+        tmp_path.replace(path)
+        return data
+
+    async def close(self):
+        await self.inner.close()
+
+
+class ReplayClient(FakeUnderstatClient):
+    # Serves recorded responses, falling back to a synthetic league when one is given
+
+    def __init__(self, directory=RECORDING_DIR, synthetic=None, latency=REPLAY_LATENCY, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.directory = Path(directory)
+        self.synthetic = synthetic
+
+    def response(self, endpoint):
+        path = recording_path(self.directory, endpoint)
+        if path.exists():
+            return json.loads(path.read_text())
+        if self.synthetic is not None:
+            return self.synthetic.payload(endpoint)
+        raise FileNotFoundError(f"No recorded response for {endpoint} in {self.directory}")
+
+
+FIRST_NAMES = [
+    "Adam", "Ben", "Callum", "Dan", "Eddie", "Fabio", "Gabriel", "Harry", "Ivan", "Jack",
+    "Kai", "Leon", "Marco", "Nathan", "Oscar", "Pedro", "Ruben", "Sam", "Tom", "Youri",
+]
+LAST_NAMES = [
+    "Adams", "Barnes", "Carvalho", "Davies", "Eriksen", "Fernandes", "García", "Hughes", "Ito", "Jensen",
+    "Kane", "Lopes", "Martínez", "Nørgaard", "Okafor", "Pereira", "Quinn", "Rossi", "Silva", "Turner",
+    "Udeh", "Vidal", "Walker", "Xhaka", "Young", "Zielinski", "Ødegaard", "Baptiste", "Collins", "Doyle",
+]
+CITIES = [
+    "Ashford", "Bramley", "Carlton", "Dunmore", "Eastleigh", "Fairview", "Grantham", "Hollins", "Ivybridge", "Kingsbury",
+    "Lydford", "Marston", "Newbury", "Oakham", "Pennington", "Redbridge", "Southam", "Thornbury", "Upton", "Westford",
+]
+CLUB_SUFFIXES = ["United", "City", "Town", "Rovers", "Athletic"]
+
+# Squad slot -> Understat position string; outfield slots also weight how often a player shoots
+SQUAD_POSITIONS = ["GK", "GK S", "D", "D", "D", "D", "D S", "D S", "M", "M", "M", "M", "M S", "D M", "F M", "F", "F", "F S", "F M S"]
+SHOT_WEIGHTS = {"GK": 0, "D": 1, "M": 3, "F": 8}
+SITUATIONS = ["OpenPlay", "OpenPlay", "OpenPlay", "OpenPlay", "FromCorner", "SetPiece", "DirectFreekick", "Penalty"]
+SHOT_TYPES = ["RightFoot", "LeftFoot", "Head"]
+
+
+# Match and shot ids are season * stride + index, so getMatchData can recover the season from
+# an id. A billion per season covers every fixture of a 30,000-team league and its shots.
+SEASON_ID_STRIDE = 10**9
+
+
+class SyntheticLeague:
+    # Deterministic fake league producing Understat-shaped payloads at any size:
+    # teams * squad_size players, a double round robin and Poisson shot counts per match.
+    # 100 teams of 25 gives 2,500 players and ~250,000 shots per season.
+
+    def __init__(
+        self,
+        teams=SYNTHETIC_TEAMS,
+        squad_size=SYNTHETIC_SQUAD_SIZE,
+        shots_per_match=SYNTHETIC_SHOTS_PER_MATCH,
+        seasons=None,
+        finished_ratio=0.85,
+        seed=0,
+    ):
+        self.teams = teams
+        self.squad_size = squad_size
+        self.shots_per_match = shots_per_match
+        self.seasons = sorted(seasons or set(SHOT_STORE_SEASONS) | {CURRENT_SEASON})
+        self.finished_ratio = finished_ratio
+        self.seed = seed
+        self._seasons = {}
+
+        self.team_names = [
+            f"{CITIES[i % len(CITIES)]} {CLUB_SUFFIXES[i // len(CITIES) % len(CLUB_SUFFIXES)]}"
+            + ("" if i < len(CITIES) * len(CLUB_SUFFIXES) else f" {i // (len(CITIES) * len(CLUB_SUFFIXES)) + 1}")
+            for i in range(teams)
+        ]
+        n_players = teams * squad_size
+        self.player_ids = np.arange(1, n_players + 1)
+        self.player_team = np.arange(n_players) // squad_size
+        slots = np.arange(n_players) % squad_size
+        self.player_position = np.array([SQUAD_POSITIONS[slot % len(SQUAD_POSITIONS)] for slot in slots])
+        self.player_names = np.array([
+            f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i * 7 + i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+            for i in range(n_players)
+        ])
+        main = np.array([position.strip()[-3] if position.strip()[-1] == "S" and len(position.strip()) >= 3 else position.strip()[-1] for position in self.player_position])
+        main = np.where(main == "K", "GK", main)
+        self.shot_weight = np.array([SHOT_WEIGHTS[letter] for letter in main], dtype=float)
+
+    def season(self, season):
+        season = str(season)
+        if season not in self._seasons:
+            self._seasons[season] = self._generate(season)
+        return self._seasons[season]
+
+    def _generate(self, season):
+        rng = np.random.default_rng(self.seed + int(season))
+
+        home, away = np.meshgrid(np.arange(self.teams), np.arange(self.teams), indexing="ij")
+        fixtures = home != away
+        home, away = home[fixtures], away[fixtures]
+        order = rng.permutation(len(home))
+        home, away = home[order], away[order]
+        matchday = np.arange(len(home)) // max(1, self.teams // 2)
+        n_matchdays = matchday.max() + 1
+        spacing = max(1, 280 // int(n_matchdays))
+        kickoff = np.datetime64(f"{season}-08-15T15:00:00")
+        dates = kickoff + (matchday * spacing).astype("timedelta64[D]")
+        finished = matchday < int(n_matchdays * self.finished_ratio)
+        match_ids = int(season) * SEASON_ID_STRIDE + np.arange(len(home))
+
+        # Shots for finished matches, shooters weighted towards forwards
+        counts = np.where(finished, rng.poisson(self.shots_per_match, len(home)), 0)
+        shot_match = np.repeat(np.arange(len(home)), counts)
+        is_home = rng.random(len(shot_match)) < 0.55
+        shot_team = np.where(is_home, home[shot_match], away[shot_match])
+        weights = self.shot_weight.reshape(self.teams, self.squad_size)
+        weights = weights / weights.sum(axis=1, keepdims=True)
+        cumulative = weights.cumsum(axis=1)
+        draws = rng.random(len(shot_match))
+        slot = (cumulative[shot_team] < draws[:, None]).sum(axis=1).clip(max=self.squad_size - 1)
+        shooter = shot_team * self.squad_size + slot
+
+        situation = np.array(SITUATIONS)[rng.integers(0, len(SITUATIONS), len(shot_match))]
+        xg = np.where(situation == "Penalty", 0.76, rng.beta(1.1, 9.0, len(shot_match))).round(4)
+        goal = rng.random(len(shot_match)) < xg
+        home_goals = np.bincount(shot_match[goal & is_home], minlength=len(home))
+        away_goals = np.bincount(shot_match[goal & ~is_home], minlength=len(home))
+
+        shots = pd.DataFrame({
+            "id": int(season) * SEASON_ID_STRIDE + np.arange(len(shot_match)),
+            "minute": rng.integers(1, 96, len(shot_match)),
+            "result": np.where(goal, "Goal", np.array(["SavedShot", "MissedShots", "BlockedShot"])[rng.integers(0, 3, len(shot_match))]),
+            "X": (0.70 + 0.29 * rng.random(len(shot_match))).round(3),
+            "Y": (0.20 + 0.60 * rng.random(len(shot_match))).round(3),
+            "xG": xg,
+            "player": self.player_names[shooter],
+            "h_a": np.where(is_home, "h", "a"),
+            "player_id": self.player_ids[shooter],
+            "situation": situation,
+            "season": season,
+            "shotType": np.array(SHOT_TYPES)[rng.integers(0, len(SHOT_TYPES), len(shot_match))],
+            "match_id": match_ids[shot_match],
+            "h_team": np.array(self.team_names)[home[shot_match]],
+            "a_team": np.array(self.team_names)[away[shot_match]],
+            "h_goals": home_goals[shot_match],
+            "a_goals": away_goals[shot_match],
+            "date": pd.to_datetime(dates[shot_match]).strftime("%Y-%m-%d %H:%M:%S"),
+            "player_assisted": None,
+            "lastAction": "Pass",
+        })
+
+        matches = pd.DataFrame({
+            "id": match_ids,
+            "home": home,
+            "away": away,
+            "isResult": finished,
+            "h_goals": home_goals,
+            "a_goals": away_goals,
+            "h_xG": np.bincount(shot_match[is_home], weights=xg[is_home], minlength=len(home)).round(4),
+            "a_xG": np.bincount(shot_match[~is_home], weights=xg[~is_home], minlength=len(home)).round(4),
+            "datetime": pd.to_datetime(dates).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+        return {
+            "shots": shots,
+            "matches": matches,
+            "player_shots": shots.groupby("player_id").indices,
+            "match_shots": shots.groupby("match_id").indices,
+            "players": self._player_totals(rng, shots, matches),
+        }
+
+    def _player_totals(self, rng, shots, matches):
+        n_players = len(self.player_ids)
+        shooter = shots["player_id"].to_numpy() - 1
+        goal = (shots["result"] == "Goal").to_numpy()
+        penalty = (shots["situation"] == "Penalty").to_numpy()
+        xg = shots["xG"].to_numpy()
+
+        team_games = np.bincount(
+            np.concatenate([matches.loc[matches["isResult"], "home"], matches.loc[matches["isResult"], "away"]]),
+            minlength=self.teams,
+        )
+        games = rng.binomial(team_games[self.player_team], 0.75)
+        xa = rng.gamma(1.2, 0.06, n_players) * games * (self.shot_weight > 0)
+        players = pd.DataFrame({
+            "id": self.player_ids,
+            "player_name": self.player_names,
+            "games": games,
+            "time": games * rng.integers(55, 91, n_players),
+            "goals": np.bincount(shooter[goal], minlength=n_players),
+            "xG": np.bincount(shooter, weights=xg, minlength=n_players).round(4),
+            "assists": rng.poisson(xa),
+            "xA": xa.round(4),
+            "shots": np.bincount(shooter, minlength=n_players),
+            "key_passes": rng.poisson(xa * 12),
+            "yellow_cards": rng.poisson(games * 0.1),
+            "red_cards": rng.binomial(1, 0.03, n_players),
+            "position": self.player_position,
+            "team_title": np.array(self.team_names)[self.player_team],
+            "npg": np.bincount(shooter[goal & ~penalty], minlength=n_players),
+            "npxG": np.bincount(shooter[~penalty], weights=xg[~penalty], minlength=n_players).round(4),
+            "xGChain": (xa * 2.5).round(4),
+            "xGBuildup": (xa * 1.2).round(4),
+        })
+        return players[players["games"] > 0]
+
+    def _match_dates(self, matches):
+        names = np.array(self.team_names)
+        records = []
+        for row in matches.itertuples(index=False):
+            record = {
+                "id": str(row.id),
+                "isResult": bool(row.isResult),
+                "h": {"id": str(row.home + 1), "title": str(names[row.home]), "short_title": names[row.home][:3].upper()},
+                "a": {"id": str(row.away + 1), "title": str(names[row.away]), "short_title": names[row.away][:3].upper()},
+                "goals": {"h": str(row.h_goals), "a": str(row.a_goals)} if row.isResult else {"h": None, "a": None},
+                "xG": {"h": str(row.h_xG), "a": str(row.a_xG)} if row.isResult else {"h": None, "a": None},
+                "datetime": row.datetime,
+            }
+            if row.isResult:
+                record["forecast"] = {"w": "0.4", "d": "0.3", "l": "0.3"}
+            records.append(record)
+        return records
+
+    @staticmethod
+    def _records(frame):
+        # Understat sends every scalar as a string
+        return frame.astype(object).where(frame.notna(), None).map(lambda v: v if v is None else str(v)).to_dict("records")
+
+    def payload(self, endpoint):
+        kind, *args = endpoint.split("/")
+        if kind == "getLeagueData":
+            data = self.season(args[1])
+            return {
+                "players": self._records(data["players"]),
+                "dates": self._match_dates(data["matches"]),
+                "teams": {},
+            }
+        if kind == "getPlayerData":
+            player_id = int(args[0])
+            frames = [
+                data["shots"].iloc[data["player_shots"][player_id]]
+                for data in map(self.season, self.seasons)
+                if player_id in data["player_shots"]
+            ]
+            shots = self._records(pd.concat(frames)) if frames else []
+            return {"shots": shots, "matches": [], "groups": {}}
+        if kind == "getTeamData":
+            team, season = args
+            data = self.season(season)
+            if team not in self.team_names:
+                return {"dates": [], "players": [], "statistics": {}}
+            team_index = self.team_names.index(team)
+            matches = data["matches"]
+            return {
+                "dates": self._match_dates(matches[(matches["home"] == team_index) | (matches["away"] == team_index)]),
+                "players": [],
+                "statistics": {},
+            }
+        if kind == "getMatchData":
+            match_id = int(args[0])
+            data = self.season(str(match_id // SEASON_ID_STRIDE))
+            shots = data["shots"].iloc[data["match_shots"].get(match_id, [])]
+            return {
+                "shots": {
+                    "h": self._records(shots[shots["h_a"] == "h"]),
+                    "a": self._records(shots[shots["h_a"] == "a"]),
+                },
+                "rosters": {},
+            }
+        raise ValueError(f"Unknown Understat endpoint: {endpoint}")
+
+
+def make_client(backend=UNDERSTAT_BACKEND):
+    if backend == "live":
+        return UnderstatClient()
+    if backend == "record":
+        return RecordingClient(UnderstatClient())
+    if backend == "replay":
+        return ReplayClient(synthetic=SyntheticLeague() if REPLAY_SYNTHETIC else None)
+    raise ValueError(f"Unknown Understat backend {backend!r}; expected live, record or replay")
@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import pandas as pd
+
+from src.artifacts import write_artifact
+from src.config import LEAGUE, OFFLINE, SHOT_STORE_SEASONS
+from src.data import DERIVED_COLUMNS, PLAYER_SCHEMA, get_client, transform_league_data
+from src.form import league_form, match_rows, rolling_form
+from src.percentiles import PercentileEngine
+from src.shots import refresh_shot_store, stored_matches
+from src.store import latest_snapshot, read_snapshot
+from src.understat import run_sync
+
+PERCENTILE_METRICS = list(PLAYER_SCHEMA) + DERIVED_COLUMNS
+
+
+def load_players(league, season):
+    # Fresh from Understat (or the replay backend); the latest snapshot if that is not possible
+    snapshot = latest_snapshot(league, season)
+    if not OFFLINE:
+        try:
+            return transform_league_data(pd.DataFrame(run_sync(get_client().league_player_data(league, str(season)))))
+        except Exception:
+            if snapshot is None:
+                raise
+    if snapshot is None:
+        raise FileNotFoundError(f"No player snapshot for {league} {season}")
+    return read_snapshot(snapshot)
+
+
+def load_shots(league, season):
+    if not OFFLINE:
+        refresh_shot_store(season, league)
+    shot_snapshot = latest_snapshot(league, season, kind="shots")
+    match_snapshot = latest_snapshot(league, season, kind="matches")
+    if shot_snapshot is None or match_snapshot is None:
+        return None, None
+    return read_snapshot(shot_snapshot), stored_matches(read_snapshot(match_snapshot))
+
+
+def build_season(league, season):
+    players = load_players(league, season)
+    shots, matches = load_shots(league, season)
+
+    form = series = None
+    if shots is not None:
+        # Sorted the way ShotStore indexes them, so loading needs no re-sort
+        shots = shots.dropna(subset=["player_id"]).sort_values(["player_id", "date"], kind="stable")
+        form = league_form(players, shots, matches)
+        series = rolling_form(match_rows(players, shots, matches))
+
+    outfield = players.loc[players["main_position"] != "Goalkeeper"]
+    percentiles = PercentileEngine(outfield, PERCENTILE_METRICS, group_col="main_position")
+
+    frames = {"players": players, "shots": shots, "matches": matches, "form": form, "series": series}
+    return write_artifact(league, season, frames, percentiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build versioned season artifacts for the app to memory-map at startup.")
+    parser.add_argument("--league", action="append", dest="leagues", help="League to build (repeatable, default the configured league)")
+    parser.add_argument("--season", action="append", dest="seasons", help="Season to build (repeatable)")
+    args = parser.parse_args()
+
+    for league in args.leagues or [LEAGUE]:
+        for season in args.seasons or SHOT_STORE_SEASONS:
+            start = time.perf_counter()
+            path = build_season(league, season)
+            print(f"{league} {season}: {path} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
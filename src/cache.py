@@ -0,0 +1,112 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    # Thread-safe LRU cache bounded by entry count and approximate bytes,
+    # with a per-entry time to live. Shared by every session in the process.
+
+    def __init__(self, ttl=3600, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                # Expired entries stay until evicted or replaced so get_stale can still serve them
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key, default=None):
+        # Last stored value regardless of age, for when upstream is unavailable
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[1]
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SingleFlight:
+    # Concurrent callers for the same key await one shared upstream call instead of
+    # each issuing their own. Used from the single client event loop, so no lock is needed.
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def do(self, key, fn, *args):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller timing out does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+        }
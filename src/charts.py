@@ -0,0 +1,342 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from src.config import SHOT_MAP_BIN_SIZE, SHOT_MAP_MAX_POINTS, SHOT_MAP_WEBGL_THRESHOLD
+
+
+def scatter_shotsvsxG(df, x="shots_per90", y="xG_per_shot", title="xG Per Shot vs Shots Taken Per 90"):
+    pos_colors = {
+        "Goalkeeper": "#6b7280",
+        "Defender": "#2e8467",
+        "Midfielder": "#3b5070",
+        "Forward": "#aa4242",
+    }
+
+    xlim = df[x].max() * 0.5 if df[x].notna().any() else 0
+    ylim = df[y].max() * 0.5 if df[y].notna().any() else 0
+    label_mask = (df[x] >= xlim) | (df[y] >= ylim)
+    labels = np.where(label_mask, df["last_name"], None)
+
+    fig = px.scatter(
+        df,
+        x=x,
+        y=y,
+        hover_name="player_name",
+        color="main_position",
+        color_discrete_map=pos_colors,
+        title=title,
+        height=430,
+        text=labels,
+    )
+
+    fig.update_layout(
+        template="plotly_dark",
+        showlegend=False,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="rgba(255,255,255,0.68)"),
+        title=dict(font=dict(size=18, color="rgba(255,255,255,0.78)"), x=0.02, xanchor="left"),
+        margin=dict(l=10, r=10, t=52, b=10),
+        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False),
+        yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False),
+    )
+    fig.update_traces(textposition="top center", marker=dict(size=9, opacity=0.82, line=dict(width=0)))
+    return fig
+
+
+def top10_bar(df, metric="xG_diff", title="xG Over and Underperformers (Goals - xG)"):
+    num_players = len(df)
+    top10 = df.sort_values(by=metric, ascending=False).head(min(10, num_players // 2 + num_players % 2))
+    bottom10 = df.sort_values(by=metric, ascending=True).head(min(10, num_players // 2)).iloc[::-1]
+    plot_df = pd.concat([top10, bottom10]).copy()
+    plot_df[metric] = plot_df[metric].round(1)
+
+    fig = px.bar(
+        plot_df,
+        x=metric,
+        y="player_name",
+        orientation="h",
+        text=metric,
+        title=title,
+        height=880,
+    )
+
+    fig.update_traces(marker_line_width=0, textposition="outside")
+    fig.update_layout(
+        template="plotly_dark",
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="rgba(255,255,255,0.68)"),
+        title=dict(font=dict(size=18, color="rgba(255,255,255,0.78)"), x=0.02, xanchor="left"),
+        margin=dict(l=10, r=10, t=52, b=10),
+        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=True, zerolinecolor="rgba(255,255,255,0.22)"),
+        yaxis=dict(showgrid=False),
+    )
+    return fig
+
+
+def in_form_bar(df, n=10, title="In-form players (goals in team's last 5 matches)"):
+    plot_df = df.sort_values(["goals_last_5", "xG_last_5"], ascending=False).head(n).iloc[::-1]
+
+    fig = px.bar(
+        plot_df,
+        x="goals_last_5",
+        y="player_name",
+        orientation="h",
+        text="goals_last_5",
+        title=title,
+        height=430,
+        hover_data={"current_team": True, "shots_last_5": True, "xG_last_5": ":.2f"},
+        labels={
+            "goals_last_5": "Goals",
+            "player_name": "Player",
+            "current_team": "Team",
+            "shots_last_5": "Shots",
+            "xG_last_5": "xG",
+        },
+    )
+
+    fig.update_traces(marker_line_width=0, textposition="outside")
+    fig.update_layout(
+        template="plotly_dark",
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="rgba(255,255,255,0.68)"),
+        title=dict(font=dict(size=18, color="rgba(255,255,255,0.78)"), x=0.02, xanchor="left"),
+        margin=dict(l=10, r=10, t=52, b=10),
+        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", title=None, dtick=1),
+        yaxis=dict(showgrid=False, title=None),
+    )
+    return fig
+
+
+def form_trend(series, metric="xG", label="xG", window=5):
+    # series maps a player name to their rows of the rolling form series, in date order
+    fig = go.Figure()
+    for name, rows in series.items():
+        fig.add_trace(
+            go.Scatter(
+                x=rows["date"],
+                y=rows[f"{metric}_{window}"],
+                mode="lines+markers",
+                name=name,
+                customdata=np.column_stack([rows[metric].to_numpy(), rows["match_id"].to_numpy()]),
+                hovertemplate=f"%{{x|%d %b %Y}}<br>{label} per match, last {window}: %{{y:.2f}}<br>{label} this match: %{{customdata[0]:.2f}}<extra>%{{fullData.name}}</extra>",
+            )
+        )
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=430,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="rgba(255,255,255,0.68)"),
+        margin=dict(l=10, r=10, t=20, b=10),
+        legend=dict(
+            title=dict(text="Players", font=dict(color="rgba(255,255,255,0.64)")),
+            font=dict(color="rgba(255,255,255,0.68)")
+        ),
+        xaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False),
+        yaxis=dict(showgrid=True, gridcolor="rgba(255,255,255,0.09)", zeroline=False, rangemode="tozero", title=f"{label} per match (rolling {window})"),
+    )
+    return fig
+
+
+PITCH_LENGTH = 95
+PITCH_WIDTH = 60
+WINDOW_MONTHS = {"Last 6 months": 6, "Last 12 months": 12}
+
+
+def build_pitch_template():
+    # Goal-end half of the pitch: penalty box, six-yard box, penalty arc and the outer frame.
+    # Built once per process; shot maps reuse the layout and arc trace instead of redrawing them.
+    box_depth = 16.5
+    box_width = 40.3
+    six_yard_depth = 5.5
+    six_yard_width = 18.3
+    pitch_line = dict(color="white", width=2)
+
+    shapes = [
+        dict(
+            type="rect",
+            x0=(PITCH_WIDTH - box_width) / 2,
+            x1=(PITCH_WIDTH + box_width) / 2,
+            y0=PITCH_LENGTH - box_depth,
+            y1=PITCH_LENGTH,
+            line=pitch_line,
+        ),
+        dict(
+            type="rect",
+            x0=(PITCH_WIDTH - six_yard_width) / 2,
+            x1=(PITCH_WIDTH + six_yard_width) / 2,
+            y0=PITCH_LENGTH - six_yard_depth,
+            y1=PITCH_LENGTH,
+            line=pitch_line,
+        ),
+        dict(type="rect", x0=0, x1=PITCH_WIDTH, y0=60, y1=PITCH_LENGTH, line=pitch_line),
+    ]
+
+    penalty_spot_x = PITCH_WIDTH / 2
+    penalty_spot_y = PITCH_LENGTH - 11
+    arc_radius = 9.15
+
+    theta = np.linspace(0, 2 * np.pi, 300)
+    arc_x = penalty_spot_x + arc_radius * np.cos(theta)
+    arc_y = penalty_spot_y + arc_radius * np.sin(theta)
+    mask = arc_y < PITCH_LENGTH - box_depth
+
+    arc = go.Scatter(
+        x=arc_x[mask],
+        y=arc_y[mask],
+        mode="lines",
+        line=pitch_line,
+        showlegend=False,
+        hoverinfo="skip"
+    )
+
+    hidden_axis = dict(showgrid=False, showticklabels=False, zeroline=False, visible=False)
+    layout = go.Layout(
+        width=420,
+        height=350,
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=40, b=0),
+        showlegend=False,
+        legend=dict(tracegroupgap=0, itemsizing="constant"),
+        xaxis=dict(range=[0, PITCH_WIDTH], title=None, **hidden_axis),
+        yaxis=dict(range=[60, PITCH_LENGTH], title=None, scaleanchor="x", scaleratio=1, **hidden_axis),
+        shapes=shapes,
+    )
+    return layout, arc
+
+
+PITCH_LAYOUT, PITCH_ARC = build_pitch_template()
+
+
+def window_start(time_window: str, today=None):
+    # First date inside a "Last N months" window; None for all time
+    months = WINDOW_MONTHS.get(time_window)
+    if months is None:
+        return None
+    return pd.Timestamp(today or pd.Timestamp.today()) - pd.DateOffset(months=months)
+
+
+def filter_shots(shots: pd.DataFrame, time_window: str = "All time", shot_type: str = "All shots", today=None):
+    dates = shots["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+
+    cutoff_date = window_start(time_window, today)
+    if cutoff_date is not None and dates.is_monotonic_increasing:
+        # Date-sorted shots (shot store slices): the window is a tail, found by binary search
+        start = dates.searchsorted(cutoff_date, side="left")
+        shots, dates, cutoff_date = shots.iloc[start:], dates.iloc[start:], None
+
+    keep = np.ones(len(shots), dtype=bool)
+    if cutoff_date is not None:
+        keep &= (dates >= cutoff_date).to_numpy()
+    if shot_type == "Open play":
+        keep &= (shots["situation"] == "OpenPlay").to_numpy()
+
+    if keep.all():
+        return shots, dates
+    return shots.loc[keep], dates.loc[keep]
+
+
+def pitch_coordinates(shots: pd.DataFrame):
+    # Understat X/Y are fractions of the pitch; map them onto the goal-end template
+    x = PITCH_WIDTH - shots["Y"].to_numpy(dtype=float) * PITCH_WIDTH
+    y = shots["X"].to_numpy(dtype=float) * PITCH_LENGTH
+    return x, y
+
+
+def pitch_grid(bin_size=SHOT_MAP_BIN_SIZE):
+    cols = int(np.ceil(PITCH_WIDTH / bin_size))
+    rows = int(np.ceil((PITCH_LENGTH - 60) / bin_size))
+    centres_x = (np.arange(cols) + 0.5) * bin_size
+    centres_y = 60 + (np.arange(rows) + 0.5) * bin_size
+    return rows, cols, centres_x, centres_y
+
+
+def shot_cells(x, y, bin_size=SHOT_MAP_BIN_SIZE):
+    # Flat grid cell of every shot inside the visible goal end, in one vectorised pass
+    rows, cols, _, _ = pitch_grid(bin_size)
+    with np.errstate(invalid="ignore"):
+        col = np.floor(x / bin_size)
+        row = np.floor((y - 60) / bin_size)
+    inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+    cells = row[inside].astype(np.int64) * cols + col[inside].astype(np.int64)
+    return inside, cells
+
+
+def shot_density(x, y, xg, bin_size=SHOT_MAP_BIN_SIZE):
+    # Shot counts and total xG per grid cell, so the figure holds one value per cell
+    # however many shots there are
+    rows, cols, centres_x, centres_y = pitch_grid(bin_size)
+    inside, cells = shot_cells(x, y, bin_size)
+    counts = np.bincount(cells, minlength=rows * cols).reshape(rows, cols)
+    xg_sum = np.bincount(cells, weights=np.nan_to_num(xg[inside]), minlength=rows * cols).reshape(rows, cols)
+    return centres_x, centres_y, counts, xg_sum
+
+
+def pitch_heatmap(centres_x, centres_y, values, customdata, hovertemplate, colorscale="YlOrRd"):
+    # Grid values drawn under the pitch markings; empty cells (NaN) stay transparent
+    trace = go.Heatmap(
+        x=centres_x,
+        y=centres_y,
+        z=values,
+        customdata=customdata,
+        colorscale=colorscale,
+        showscale=False,
+        hoverongaps=False,
+        hovertemplate=hovertemplate,
+    )
+    return go.Figure(data=[trace, PITCH_ARC], layout=PITCH_LAYOUT)
+
+
+def create_shot_map(shots: pd.DataFrame, time_window: str = "All time", shot_type: str = "All shots", today=None, style: str = "Shots"):
+    if shots.empty:
+        return None
+
+    shots, dates = filter_shots(shots, time_window, shot_type, today)
+    if shots.empty:
+        return None
+
+    x, y = pitch_coordinates(shots)
+    xg = shots["xG"].to_numpy(dtype=float)
+
+    if style == "Density" or len(shots) > SHOT_MAP_MAX_POINTS:
+        centres_x, centres_y, counts, xg_sum = shot_density(x, y, xg)
+        return pitch_heatmap(
+            centres_x,
+            centres_y,
+            np.where(counts > 0, counts, np.nan),
+            xg_sum,
+            "Shots=%{z}<br>xG=%{customdata:.2f}<extra></extra>",
+        )
+
+    # Same marker scaling and default colour px.scatter(size="xG", size_max=10) would pick;
+    # long careers switch to WebGL so the browser is not drawing thousands of SVG nodes
+    colorway = pio.templates[pio.templates.default].layout.colorway or ["#636efa"]
+    scatter = go.Scattergl if len(shots) > SHOT_MAP_WEBGL_THRESHOLD else go.Scatter
+    points = scatter(
+        x=x,
+        y=y,
+        mode="markers",
+        marker=dict(
+            color=colorway[0],
+            size=xg,
+            sizemode="area",
+            sizeref=2.0 * np.nanmax(xg) / 10 ** 2 if np.isfinite(xg).any() else 1,
+            symbol="circle",
+        ),
+        customdata=np.column_stack([shots["shotType"].to_numpy(), shots["minute"].to_numpy(), dates.to_numpy()]),
+        hovertemplate="y=%{x}<br>x=%{y}<br>xG=%{marker.size}<br>shotType=%{customdata[0]}<br>minute=%{customdata[1]}<br>date=%{customdata[2]}<extra></extra>",
+        showlegend=False,
+    )
+
+    return go.Figure(data=[points, PITCH_ARC], layout=PITCH_LAYOUT)
@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+LEAGUE = os.environ.get("PREMSTATS_LEAGUE", "EPL")
+CURRENT_SEASON = os.environ.get("PREMSTATS_CURRENT_SEASON", "2025")
+
+# On-disk season snapshots (see src/store.py)
+SNAPSHOT_DIR = Path(os.environ.get("PREMSTATS_SNAPSHOT_DIR", ROOT_DIR / "data" / "snapshots"))
+SNAPSHOT_MAX_AGE = int(os.environ.get("PREMSTATS_SNAPSHOT_MAX_AGE", 3600))
+SNAPSHOT_KEEP = int(os.environ.get("PREMSTATS_SNAPSHOT_KEEP", 3))
+# Finished seasons never change: once snapshotted they are never refetched
+COMPLETED_SEASONS = set(os.environ.get("PREMSTATS_COMPLETED_SEASONS", "2024").split(","))
+
+# In-process league frames are served stale and refreshed in the background after this
+# many seconds. A non-zero max staleness makes requests block once a frame gets that old.
+LEAGUE_REFRESH_INTERVAL = int(os.environ.get("PREMSTATS_LEAGUE_REFRESH_INTERVAL", SNAPSHOT_MAX_AGE))
+LEAGUE_MAX_STALENESS = int(os.environ.get("PREMSTATS_LEAGUE_MAX_STALENESS", 0))
+
+# Serve only from local snapshots, never call Understat
+OFFLINE = os.environ.get("PREMSTATS_OFFLINE", "0") == "1"
+
+# Process-wide caches for per-player shots and per-team fixtures (see src/cache.py)
+FETCH_CACHE_TTL = int(os.environ.get("PREMSTATS_FETCH_CACHE_TTL", 3600))
+FETCH_CACHE_MAX_ENTRIES = int(os.environ.get("PREMSTATS_FETCH_CACHE_MAX_ENTRIES", 512))
+FETCH_CACHE_MAX_BYTES = int(os.environ.get("PREMSTATS_FETCH_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+# Concurrent Understat fetches for the comparison page
+FETCH_WORKERS = int(os.environ.get("PREMSTATS_FETCH_WORKERS", 8))
+FETCH_TIMEOUT = float(os.environ.get("PREMSTATS_FETCH_TIMEOUT", 10))
+
+# Pooled async Understat client (see src/understat.py)
+UNDERSTAT_MAX_CONNECTIONS = int(os.environ.get("PREMSTATS_UNDERSTAT_MAX_CONNECTIONS", 20))
+UNDERSTAT_MAX_CONCURRENCY = int(os.environ.get("PREMSTATS_UNDERSTAT_MAX_CONCURRENCY", 8))
+UNDERSTAT_TIMEOUT = float(os.environ.get("PREMSTATS_UNDERSTAT_TIMEOUT", 30))
+
+# League-wide shot store (see src/shots.py); "All time" shot maps cover these seasons
+SHOT_STORE_SEASONS = os.environ.get("PREMSTATS_SHOT_STORE_SEASONS", "2024,2025").split(",")
+SHOT_STORE_REFRESH = int(os.environ.get("PREMSTATS_SHOT_STORE_REFRESH", 1800))
+
+# Resilience around every Understat request (see src/resilience.py)
+UNDERSTAT_RATE = float(os.environ.get("PREMSTATS_UNDERSTAT_RATE", 5))
+UNDERSTAT_BURST = int(os.environ.get("PREMSTATS_UNDERSTAT_BURST", 10))
+UNDERSTAT_RETRIES = int(os.environ.get("PREMSTATS_UNDERSTAT_RETRIES", 3))
+UNDERSTAT_BACKOFF_BASE = float(os.environ.get("PREMSTATS_UNDERSTAT_BACKOFF_BASE", 0.5))
+UNDERSTAT_BACKOFF_MAX = float(os.environ.get("PREMSTATS_UNDERSTAT_BACKOFF_MAX", 8))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("PREMSTATS_BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("PREMSTATS_BREAKER_RESET_TIMEOUT", 30))
+
+# Client backend: "live" (Understat), "record" (live + save raw responses) or
+# "replay" (serve saved responses, optionally generated ones, with simulated latency)
+UNDERSTAT_BACKEND = os.environ.get("PREMSTATS_UNDERSTAT_BACKEND", "live")
+RECORDING_DIR = Path(os.environ.get("PREMSTATS_RECORDING_DIR", ROOT_DIR / "data" / "recordings"))
+REPLAY_LATENCY = float(os.environ.get("PREMSTATS_REPLAY_LATENCY", 0.0))
+REPLAY_SYNTHETIC = os.environ.get("PREMSTATS_REPLAY_SYNTHETIC", "0") == "1"
+SYNTHETIC_TEAMS = int(os.environ.get("PREMSTATS_SYNTHETIC_TEAMS", 20))
+SYNTHETIC_SQUAD_SIZE = int(os.environ.get("PREMSTATS_SYNTHETIC_SQUAD_SIZE", 25))
+SYNTHETIC_SHOTS_PER_MATCH = float(os.environ.get("PREMSTATS_SYNTHETIC_SHOTS_PER_MATCH", 25))
+
+# Per-rerun stage timings (see src/timing.py). Always on when set, otherwise opt-in per
+# session with ?debug=1. Exported to a JSONL file and/or a Prometheus text endpoint.
+TIMING_ENABLED = os.environ.get("PREMSTATS_TIMING", "0") == "1"
+TIMING_LOG = os.environ.get("PREMSTATS_TIMING_LOG", "")
+TIMING_METRICS_PORT = int(os.environ.get("PREMSTATS_TIMING_METRICS_PORT", 0))
+
+# Shot map rendering: WebGL markers above SHOT_MAP_WEBGL_THRESHOLD shots, and a binned
+# density grid (SHOT_MAP_BIN_SIZE metres per cell) above SHOT_MAP_MAX_POINTS or on request
+SHOT_MAP_WEBGL_THRESHOLD = int(os.environ.get("PREMSTATS_SHOT_MAP_WEBGL_THRESHOLD", 500))
+SHOT_MAP_MAX_POINTS = int(os.environ.get("PREMSTATS_SHOT_MAP_MAX_POINTS", 5000))
+SHOT_MAP_BIN_SIZE = float(os.environ.get("PREMSTATS_SHOT_MAP_BIN_SIZE", 2.5))
+
+# Versioned season artifacts built offline by `python -m src.build` (see src/artifacts.py)
+ARTIFACT_DIR = Path(os.environ.get("PREMSTATS_ARTIFACT_DIR", ROOT_DIR / "data" / "artifacts"))
+ARTIFACT_KEEP = int(os.environ.get("PREMSTATS_ARTIFACT_KEEP", 2))
@@ -1,59 +1,319 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timezone
+
 import numpy as np
 import pandas as pd
-import understatapi as ustat
-import streamlit as st
+import pyarrow as pa
+
+from src.backends import make_client
+from src.cache import SingleFlight, TTLCache
+from src.config import (
+    COMPLETED_SEASONS,
+    FETCH_CACHE_MAX_BYTES,
+    FETCH_CACHE_MAX_ENTRIES,
+    FETCH_CACHE_TTL,
+    FETCH_TIMEOUT,
+    FETCH_WORKERS,
+    LEAGUE,
+    LEAGUE_MAX_STALENESS,
+    LEAGUE_REFRESH_INTERVAL,
+    OFFLINE,
+    SNAPSHOT_MAX_AGE,
+)
+from src.artifacts import artifact_time, latest_artifact, read_frame
+from src.timing import span
+from src.store import latest_snapshot, read_snapshot, snapshot_time, write_snapshot
+from src.resilience import ResilientClient
+from src.understat import get_loop, run_sync
+
+# Shared by every session in the process; cached frames must be treated as read-only
+shot_cache = TTLCache(FETCH_CACHE_TTL, FETCH_CACHE_MAX_ENTRIES, FETCH_CACHE_MAX_BYTES)
+match_cache = TTLCache(FETCH_CACHE_TTL, FETCH_CACHE_MAX_ENTRIES, FETCH_CACHE_MAX_BYTES)
+# Deduplicates concurrent cache misses for the same player/team across sessions
+inflight = SingleFlight()
+
+# Long-lived so a timed-out fetch keeps running (and fills the cache) without blocking the page
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="understat")
+
+# Stale-while-revalidate league frames: season -> LeagueSnapshot, swapped in whole by one worker
+LeagueSnapshot = namedtuple("LeagueSnapshot", ["data", "as_of"])
+league_snapshots = {}
+league_refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="league-refresh")
+_refreshing = set()
+# season -> time of the last refresh attempt, so a failing upstream is retried once per interval
+_refresh_attempts = {}
+_league_lock = threading.Lock()
+
+# Reuse the API client across pages/reruns. A plain process-wide singleton rather than
+# st.cache_resource because it is also used from the client loop and background threads.
+_client = None
+_client_lock = threading.Lock()
 
-# Reuse the API client across pages/reruns
-@st.cache_resource
 def get_client():
-    return ustat.UnderstatClient()
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ResilientClient(make_client())
+    return _client
+
+def latest_season(season):
+    # The newer of the latest snapshot and a prebuilt artifact (src/build.py), read without
+    # touching upstream; artifacts are memory-mapped, so worker processes on one host share pages
+    season = str(season)
+    snapshot = latest_snapshot(LEAGUE, season)
+    artifact = latest_artifact(LEAGUE, season)
+    if artifact is not None and (snapshot is None or artifact_time(artifact) >= snapshot_time(snapshot)):
+        return LeagueSnapshot(lock_counts(read_frame(artifact, "players")), artifact_time(artifact))
+    if snapshot is not None:
+        return LeagueSnapshot(freeze_frame(read_snapshot(snapshot)), snapshot_time(snapshot))
+    return None
+
+def freeze_frame(df):
+    # Served to every session, so it is made immutable like a memory-mapped artifact: after an
+    # Arrow round trip the columns are read-only views of Arrow buffers and in-place writes raise
+    return lock_counts(pa.Table.from_pandas(df, preserve_index=False).to_pandas(split_blocks=True))
+
+def lock_counts(frame):
+    # Nullable count columns come back from Arrow as freshly allocated masked arrays, writable
+    # unlike the rest, so they are rebuilt over read-only buffers
+    masked = [col for col, dtype in frame.dtypes.items() if isinstance(dtype, (pd.Int8Dtype, pd.Int16Dtype))]
+    if not masked:
+        return frame
+    columns = {col: frame[col] for col in frame.columns}
+    for col in masked:
+        values = frame[col].to_numpy(dtype=frame[col].dtype.numpy_dtype, na_value=0)
+        mask = frame[col].isna().to_numpy()
+        values.flags.writeable = mask.flags.writeable = False
+        columns[col] = pd.arrays.IntegerArray(values, mask)
+    return pd.DataFrame(columns, copy=False)
+
+def load_season(season, refresh=False, current=None):
+    # current: the in-memory season, reused as the merge baseline instead of rereading the disk
+    season = str(season)
+    if current is None:
+        current = latest_season(season)
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def fetch_data(season):
+    if current is not None and (
+        OFFLINE
+        or season in COMPLETED_SEASONS
+        or (not refresh and time.time() - current.as_of.timestamp() < SNAPSHOT_MAX_AGE)
+    ):
+        return current
+    if OFFLINE:
+        raise FileNotFoundError(f"No offline snapshot for {LEAGUE} {season} in the snapshot store")
+
+    try:
+        with span("upstream"):
+            payload = download_league_payload(season)
+    except Exception:
+        # Upstream is down: an old snapshot beats an error page, but a refresh reports the failure
+        if current is None or refresh:
+            raise
+        return current
+
+    with span("transform"):
+        if current is None:
+            leaguedata = transform_league_data(payload)
+        else:
+            leaguedata = merge_league_data(current.data, payload)
+
+    path = write_snapshot(leaguedata, LEAGUE, season)
+    return LeagueSnapshot(freeze_frame(leaguedata), snapshot_time(path))
+
+def get_league_data(season):
+    # Serve the in-memory season immediately and revalidate it in the background. A cold
+    # process serves whatever is on disk, however old; only a season with nothing on disk,
+    # or one older than LEAGUE_MAX_STALENESS (if set), blocks on upstream.
     season = str(season)
-    client = get_client()
-    leaguedata = client.league(league='EPL').get_player_data(season=season)
-    leaguedata = pd.DataFrame(leaguedata)
+    current = league_snapshots.get(season)
+    if current is None:
+        with _league_lock:
+            current = league_snapshots.get(season)
+            if current is None:
+                current = latest_season(season) or load_season(season)
+                league_snapshots[season] = current
+
+    age = time.time() - current.as_of.timestamp()
+    if season in COMPLETED_SEASONS or OFFLINE or age < LEAGUE_REFRESH_INTERVAL:
+        return current
+    # After an attempt (failed or not) wait a full interval before the next one
+    if time.time() - _refresh_attempts.get(season, 0) < LEAGUE_REFRESH_INTERVAL:
+        return current
+    if LEAGUE_MAX_STALENESS and age > LEAGUE_MAX_STALENESS:
+        return refresh_league_data(season)
+
+    with _league_lock:
+        if season not in _refreshing:
+            _refreshing.add(season)
+            league_refresh_pool.submit(background_refresh, season)
+    return current
+
+def refresh_league_data(season):
+    _refresh_attempts[season] = time.time()
+    current = league_snapshots.get(season)
+    try:
+        fresh = load_season(season, refresh=True, current=current)
+        league_snapshots[season] = fresh
+        return fresh
+    except Exception:
+        # Keep serving the stale frame; the next attempt waits LEAGUE_REFRESH_INTERVAL
+        return current
+
+def background_refresh(season):
+    try:
+        return refresh_league_data(season)
+    finally:
+        with _league_lock:
+            _refreshing.discard(season)
+
+def format_as_of(as_of):
+    return as_of.astimezone(timezone.utc).strftime("%d %b %Y, %H:%M UTC")
+
+# The sync entry point is a thin wrapper that runs the async version on the shared client loop
+def download_league_payload(season):
+    return run_sync(download_league_payload_async(season))
+
+async def download_league_payload_async(season):
+    leaguedata = await get_client().league_player_data(LEAGUE, str(season))
+    return pd.DataFrame(leaguedata)
+
+# Understat sends every player stat as a string; this is the typed form we keep.
+# Counting stats fit comfortably in int16 (a full season is ~3,400 minutes).
+PLAYER_SCHEMA = {
+    "games": "Int16",
+    "time": "Int16",
+    "goals": "Int16",
+    "npg": "Int16",
+    "assists": "Int16",
+    "shots": "Int16",
+    "key_passes": "Int16",
+    "yellow_cards": "Int8",
+    "red_cards": "Int8",
+    "xG": "float32",
+    "xA": "float32",
+    "npxG": "float32",
+    "xGChain": "float32",
+    "xGBuildup": "float32",
+}
+CATEGORY_COLUMNS = ["team_title", "position"]
+DERIVED_COLUMNS = [
+    "shots_per90",
+    "xG_per_shot",
+    "xG_per90",
+    "xA_per90",
+    "goals_per90",
+    "assists_per90",
+    "KP_per90",
+    "xG_diff",
+]
+POSITION_NAMES = {
+    "F": "Forward",
+    "M": "Midfielder",
+    "D": "Defender",
+    "K": "Goalkeeper"
+}
 
+def main_position(position):
+    # "F M S" -> "M": the last letter, skipping a trailing "S" (substitute)
+    position = position.strip()
+    letter = position[-3] if position[-1:] == "S" and len(position) >= 3 else position[-1:]
+    return POSITION_NAMES.get(letter, letter)
+
+def transform_league_data(leaguedata):
+    return derive_league_metrics(coerce_league_data(leaguedata))
+
+def coerce_league_data(leaguedata):
     leaguedata = leaguedata.dropna(subset=["player_name"])
 
-    leaguedata["xG"] = pd.to_numeric(leaguedata["xG"], errors="coerce")
-    leaguedata["goals"] = pd.to_numeric(leaguedata["goals"], errors="coerce")
-    leaguedata["shots"] = pd.to_numeric(leaguedata["shots"], errors="coerce")
-    leaguedata["key_passes"] = pd.to_numeric(leaguedata["key_passes"], errors="coerce")
-    leaguedata["time"] = pd.to_numeric(leaguedata["time"], errors="coerce")
-    leaguedata["assists"] = pd.to_numeric(leaguedata["assists"], errors="coerce")
-    leaguedata["xA"] = pd.to_numeric(leaguedata["xA"], errors="coerce")
-
-    nineties = (leaguedata["time"] / 90).replace(0, np.nan)
-    leaguedata["shots_per90"] = leaguedata["shots"].div(nineties)
-    leaguedata["xG_per_shot"] = leaguedata["xG"].div(leaguedata["shots"]).replace([np.inf, -np.inf], np.nan)
-    leaguedata["xG_per90"] = leaguedata["xG"].div(nineties)
-    leaguedata["xA_per90"] = leaguedata["xA"].div(nineties)
-    leaguedata["goals_per90"] = leaguedata["goals"].div(nineties)
-    leaguedata["assists_per90"] = leaguedata["assists"].div(nineties)
-    leaguedata["KP_per90"] = leaguedata["key_passes"].div(nineties)
-    leaguedata["xG_diff"] = leaguedata["goals"] - leaguedata["xG"]
-
-    leaguedata["last_name"] = leaguedata["player_name"].str.split().str[-1] 
-    leaguedata["current_team"] = leaguedata["team_title"].str.split(",").str[0].str.strip()
-
-    leaguedata["main_position"] = np.where(
-    leaguedata["position"].str.strip().str[-1] == "S",
-    leaguedata["position"].str.strip().str[-3],
-    leaguedata["position"].str.strip().str[-1]
-    )
-
-    leaguedata["main_position"] = leaguedata["main_position"].replace({
-        "F": "Forward", 
-        "M": "Midfielder", 
-        "D": "Defender",
-        "K": "Goalkeeper"
-    })
+    # Coerce the whole payload against the schema in one pass into a new frame
+    columns = {}
+    for col in leaguedata.columns:
+        if col in PLAYER_SCHEMA:
+            values = pd.to_numeric(leaguedata[col], errors="coerce")
+            if PLAYER_SCHEMA[col].startswith("Int"):
+                # Counts are nullable: missing, negative, fractional or too large for the
+                # dtype (which would wrap) all become <NA> rather than a made-up number
+                dtype = np.dtype(PLAYER_SCHEMA[col].lower())
+                values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                valid = (values >= 0) & (values <= np.iinfo(dtype).max) & (values == np.trunc(values))
+                columns[col] = pd.arrays.IntegerArray(np.where(valid, values, 0).astype(dtype), ~valid)
+            else:
+                columns[col] = values.astype(PLAYER_SCHEMA[col])
+        elif col in CATEGORY_COLUMNS:
+            columns[col] = leaguedata[col].astype("category")
+        else:
+            columns[col] = leaguedata[col]
+    return pd.DataFrame(columns).reset_index(drop=True)
+
+def derive_league_metrics(leaguedata):
+    leaguedata = leaguedata.copy()
+    # Plain float32 arrays with NaN for missing counts, so the maths stays in numpy
+    # instead of going through nullable (masked) arithmetic
+    stat = {col: leaguedata[col].to_numpy(dtype=np.float32, na_value=np.nan) for col in ["time", "shots", "goals", "assists", "key_passes", "xG", "xA"]}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nineties = np.where(stat["time"] > 0, stat["time"] / np.float32(90), np.float32(np.nan))
+        xg_per_shot = stat["xG"] / stat["shots"]
+        leaguedata["shots_per90"] = stat["shots"] / nineties
+        leaguedata["xG_per_shot"] = np.where(np.isinf(xg_per_shot), np.float32(np.nan), xg_per_shot)
+        leaguedata["xG_per90"] = stat["xG"] / nineties
+        leaguedata["xA_per90"] = stat["xA"] / nineties
+        leaguedata["goals_per90"] = stat["goals"] / nineties
+        leaguedata["assists_per90"] = stat["assists"] / nineties
+        leaguedata["KP_per90"] = stat["key_passes"] / nineties
+        leaguedata["xG_diff"] = stat["goals"] - stat["xG"]
+
+    leaguedata["last_name"] = leaguedata["player_name"].str.split().str[-1]
+
+    # Team and position strings repeat heavily, so derive them once per category, not per row
+    teams = leaguedata["team_title"].cat.categories
+    positions = leaguedata["position"].cat.categories
+    leaguedata["current_team"] = leaguedata["team_title"].map({title: title.split(",")[0].strip() for title in teams}).astype("category")
+    leaguedata["main_position"] = leaguedata["position"].map({position: main_position(position) for position in positions}).astype("category")
 
     return leaguedata
 
-def get_player_id(leaguedata, player_name):
+def merge_league_data(previous, payload):
+    # Only players whose raw stats moved since the last snapshot get their metrics recomputed
+    current = coerce_league_data(payload)
+    previous = previous.drop_duplicates("id").set_index("id")
+    compare = [col for col in current.columns if col in previous.columns]
+
+    before = previous.reindex(current["id"])[compare].reset_index(drop=True)
+    after = current[compare]
+    unchanged = np.ones(len(current), dtype=bool)
+    for col in compare:
+        old, new = before[col].astype(object), after[col].astype(object)
+        unchanged &= ((old == new) | (old.isna() & new.isna())).to_numpy()
+
+    merged = pd.concat([
+        previous.loc[current.loc[unchanged, "id"]].reset_index(),
+        derive_league_metrics(current.loc[~unchanged]),
+    ])
+    # Restore upstream order and re-unify categoricals that differ between the two halves
+    merged = merged.set_index("id").loc[current["id"]].reset_index()
+    for col in CATEGORY_COLUMNS + ["current_team", "main_position"]:
+        merged[col] = merged[col].astype("category")
+    return merged
+
+def memory_report(leaguedata, raw=None):
+    # Per-column footprint of the typed frame, next to the raw payload when given
+    report = pd.DataFrame({
+        "dtype": leaguedata.dtypes.astype(str),
+        "bytes": leaguedata.memory_usage(deep=True, index=False),
+    })
+    if raw is not None:
+        report["raw_bytes"] = raw.memory_usage(deep=True, index=False).reindex(report.index)
+    report.loc["total"] = ["", report["bytes"].sum()] + ([report["raw_bytes"].sum()] if raw is not None else [])
+    return report
+
+def get_player_id(leaguedata, player_name, index=None):
+    if index is not None:
+        return index.player_id(player_name)
     player_row = leaguedata[leaguedata["player_name"] == player_name]
     if not player_row.empty:
         return str(player_row.iloc[0]["id"])
@@ -61,10 +321,13 @@ def get_player_id(leaguedata, player_name):
         return None
 
 def fetch_player_shot_data(player_id):
-    client = get_client()
-    player = client.player(player_id)
-    shot_data = player.get_shot_data()
-    shot_data = pd.DataFrame(shot_data)
+    return run_sync(fetch_player_shot_data_async(player_id))
+
+async def download_player_shot_data_async(player_id):
+    shot_data = await get_client().player_shot_data(str(player_id))
+    return transform_shot_data(pd.DataFrame(shot_data))
+
+def transform_shot_data(shot_data):
     if shot_data.empty:
         return shot_data
     # Convert relevant columns to numeric types
@@ -78,10 +341,85 @@ def fetch_player_shot_data(player_id):
     return shot_data
 
 def fetch_team_match_data(team_name, season='2025'):
-    client = get_client()
-    match_data = client.team(team_name).get_match_data(season=season)
-    match_data = pd.DataFrame(match_data)
+    return run_sync(fetch_team_match_data_async(team_name, season))
+
+async def download_team_match_data_async(team_name, season='2025'):
+    match_data = await get_client().team_match_data(team_name, str(season))
+    return transform_match_data(pd.DataFrame(match_data))
+
+def transform_match_data(match_data):
     match_data.rename(columns={"datetime": "date"}, inplace=True)
     return match_data
 
+async def fetch_player_shot_data_async(player_id):
+    key = str(player_id)
+    shot_data = shot_cache.get(key)
+    if shot_data is None:
+        shot_data = await inflight.do(("shots", key), load_player_shot_data_async, key)
+    return shot_data
+
+async def load_player_shot_data_async(player_id):
+    try:
+        return shot_cache.set(player_id, await download_player_shot_data_async(player_id))
+    except Exception:
+        # Upstream unhealthy (retries exhausted or circuit open): fall back to the last copy we had
+        stale = shot_cache.get_stale(player_id)
+        if stale is None:
+            raise
+        return stale
+
+async def fetch_team_match_data_async(team_name, season='2025'):
+    key = (team_name, str(season))
+    match_data = match_cache.get(key)
+    if match_data is None:
+        match_data = await inflight.do(("matches", key), load_team_match_data_async, key)
+    return match_data
+
+async def load_team_match_data_async(key):
+    try:
+        return match_cache.set(key, await download_team_match_data_async(*key))
+    except Exception:
+        stale = match_cache.get_stale(key)
+        if stale is None:
+            raise
+        return stale
+
+async def prewarm_async(player_ids=(), team_names=(), season='2025'):
+    # Fill the shot and fixture caches for many players/teams; concurrency is bounded by the client
+    tasks = [fetch_player_shot_data_async(player_id) for player_id in player_ids]
+    tasks += [fetch_team_match_data_async(team_name, season) for team_name in team_names]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+def prewarm(player_ids=(), team_names=(), season='2025'):
+    return run_sync(prewarm_async(player_ids, team_names, season))
+
+def fetch_concurrently(calls, timeout=FETCH_TIMEOUT):
+    # calls maps a result key to (function, *args). Returns (results, failures): a call that
+    # raised or was still running after timeout is left out of results and maps to its
+    # exception (TimeoutError for the latter) in failures, so callers can say what went wrong.
+    # Coroutine functions run on the client loop, plain functions on the thread pool.
+    futures = {}
+    for key, (fn, *args) in calls.items():
+        if asyncio.iscoroutinefunction(fn):
+            futures[key] = asyncio.run_coroutine_threadsafe(fn(*args), get_loop())
+        else:
+            futures[key] = fetch_pool.submit(fn, *args)
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    results, failures = {}, {}
+    for key, future in futures.items():
+        if future not in done:
+            failures[key] = TimeoutError(f"No response within {timeout:g}s")
+        elif future.exception() is not None:
+            failures[key] = future.exception()
+        else:
+            results[key] = future.result()
+    return results, failures
 
+def cache_stats():
+    return {
+        "player_shots": shot_cache.stats(),
+        "team_matches": match_cache.stats(),
+        "single_flight": inflight.stats(),
+        "circuit": get_client().breaker.state,
+    }
@@ -0,0 +1,39 @@
+import asyncio
+import random
+
+import aiohttp
+
+from src.understat import UnderstatClient
+
+
+class FakeUnderstatClient(UnderstatClient):
+    # Local stand-in for Understat that injects latency and upstream errors.
+    # Serves canned JSON per endpoint, or an empty payload of the right shape. Errors can be
+    # limited to endpoints starting with error_prefix, e.g. "getMatchData/".
+
+    def __init__(self, responses=None, latency=0.05, jitter=0.0, error_rate=0.0, error_status=503, error_prefix="", seed=None):
+        self.responses = responses or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_prefix = error_prefix
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+
+    async def get_json(self, endpoint):
+        self.calls += 1
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if endpoint.startswith(self.error_prefix) and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise aiohttp.ClientResponseError(None, (), status=self.error_status, message="Injected failure")
+        return self.response(endpoint)
+
+    def response(self, endpoint):
+        if endpoint in self.responses:
+            return self.responses[endpoint]
+        return {"players": [], "dates": [], "shots": [], "teams": {}}
+
+    async def close(self):
+        return None
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+
+def goals_last_5(player_shots: pd.DataFrame, team_matches: pd.DataFrame) -> float:
+    tm = team_matches.copy()
+
+    if not {"id", "date"}.issubset(tm.columns):
+        raise ValueError("team_matches must have columns: 'id' and 'date'")
+
+    tm["date"] = pd.to_datetime(tm["date"], errors="coerce")
+    if "forecast" in tm.columns:
+        tm = tm[tm["forecast"].notna()].copy()
+    elif "isResult" in tm.columns:
+        tm = tm[tm["isResult"].astype(bool)].copy()
+
+    last5_ids = (
+        tm.sort_values("date", ascending=False)
+        .drop_duplicates(subset="id", keep="first")
+        .head(5)["id"]
+        .tolist()
+    )
+    
+    if len(last5_ids) < 5:
+        return np.nan
+    else:
+        last5_ids = pd.DataFrame(last5_ids, columns=["match_id"])
+
+    ps = player_shots.copy()
+    if "date" not in ps:
+        raise ValueError("Expected a 'date' column in player_shots")
+    
+    ps["date"] = pd.to_datetime(ps["date"], errors="coerce")
+
+    if "is_goal" not in ps:
+        if "result" in ps:
+            ps["is_goal"] = ps["result"].astype(str).str.lower().eq("goal").astype(int)
+        else:
+            raise ValueError("Need either 'is_goal' or 'result' column")
+
+    if "match_id" not in ps:
+        raise ValueError("Expected a 'match_id' column to group by matches")
+
+    per_match = (
+        ps.groupby("match_id")
+        .agg(goals=("is_goal", "sum"), match_date=("date", "max"))
+        .reset_index()
+        .sort_values("match_date")
+    )
+
+    last5 = last5_ids.merge(per_match)
+
+    return int(sum(last5["goals"])) if not last5.empty else np.nan
+
+
+FORM_WINDOWS = [3, 5, 10]
+FORM_METRICS = ["goals", "xG", "shots", "xA"]
+SERIES_COLUMNS = ["player_id", "team", "match_id", "date"] + FORM_METRICS
+
+
+def team_fixtures(matches: pd.DataFrame) -> pd.DataFrame:
+    # One row per (team, finished match), from the home and away sides of each fixture
+    finished = matches.loc[matches["isResult"].astype(bool), ["id", "date", "h_team", "a_team"]]
+    return pd.concat(
+        [
+            finished[["h_team", "id", "date"]].rename(columns={"h_team": "team"}),
+            finished[["a_team", "id", "date"]].rename(columns={"a_team": "team"}),
+        ],
+        ignore_index=True,
+    ).drop_duplicates(subset=["team", "id"])
+
+
+def shots_per_match(shots: pd.DataFrame) -> pd.DataFrame:
+    return (
+        shots.assign(is_goal=shots["result"].astype(str).str.lower().eq("goal").astype(int))
+        .groupby(["player_id", "match_id"], as_index=False)
+        .agg(goals=("is_goal", "sum"), shots=("is_goal", "size"), xG=("xG", "sum"))
+    )
+
+
+def league_form(players: pd.DataFrame, shots: pd.DataFrame, matches: pd.DataFrame) -> pd.DataFrame:
+    # goals_last_5 for every player at once: each team's last 5 finished matches joined
+    # against the season's shots grouped by player and match. Like goals_last_5, players
+    # without a shot in those matches (or whose team has played fewer than 5) are left out.
+    fixtures = team_fixtures(matches)
+    last5 = fixtures.sort_values(["date", "id"], ascending=False).groupby("team").head(5)
+    last5 = last5.loc[last5.groupby("team")["id"].transform("size") == 5, ["team", "id"]]
+    last5 = last5.rename(columns={"id": "match_id"})
+
+    teams = pd.DataFrame({"player_id": players["id"].astype(str), "team": players["current_team"].astype(str)})
+
+    form = shots_per_match(shots).merge(teams, on="player_id").merge(last5, on=["team", "match_id"])
+    return (
+        form.groupby(["player_id", "team"], as_index=False)
+        .agg(goals_last_5=("goals", "sum"), shots_last_5=("shots", "sum"), xG_last_5=("xG", "sum"))
+        .astype({"goals_last_5": "int16", "shots_last_5": "int16", "xG_last_5": "float32"})
+    )
+
+
+def match_rows(players: pd.DataFrame, shots: pd.DataFrame, matches: pd.DataFrame) -> pd.DataFrame:
+    # Goals, xG, shots and xA of every player in every finished match of their current team
+    # (zeros when they were not involved). Assists are credited by name, as Understat gives them.
+    teams = pd.DataFrame({"player_id": players["id"].astype(str), "team": players["current_team"].astype(str)})
+    rows = teams.merge(team_fixtures(matches).rename(columns={"id": "match_id"}), on="team")
+
+    rows = rows.merge(shots_per_match(shots), on=["player_id", "match_id"], how="left")
+    assisted = shots.loc[shots["player_assisted"].notna(), ["player_assisted", "match_id", "xG"]] if "player_assisted" in shots else shots.iloc[0:0]
+    if not assisted.empty:
+        name_to_id = players.drop_duplicates("player_name").set_index("player_name")["id"].astype(str)
+        assisted = assisted.assign(player_id=assisted["player_assisted"].map(name_to_id)).dropna(subset=["player_id"])
+        xa = assisted.groupby(["player_id", "match_id"], as_index=False)["xG"].sum().rename(columns={"xG": "xA"})
+        rows = rows.merge(xa, on=["player_id", "match_id"], how="left")
+    else:
+        rows["xA"] = 0.0
+
+    rows[FORM_METRICS] = rows[FORM_METRICS].fillna(0)
+    return rows[SERIES_COLUMNS].astype({"goals": "int8", "shots": "int8", "xG": "float32", "xA": "float32"})
+
+
+def rolling_form(rows: pd.DataFrame, history: pd.DataFrame = None) -> pd.DataFrame:
+    # Appends new per-match rows (matches not yet in history) to a stored series and fills in their rolling means. Only
+    # the affected players' last max(FORM_WINDOWS) - 1 stored matches are re-read, so the rolling
+    # computation grows with the matchday, not the season; the returned frame is still the whole
+    # series. Stored matches dated after a new one (a postponed fixture played late) are recomputed too.
+    lookback = max(FORM_WINDOWS) - 1
+    if history is None or history.empty:
+        history, context, redo = None, rows.iloc[0:0], rows.iloc[0:0]
+    else:
+        first_new = rows.groupby("player_id")["date"].min()
+        affected = history.loc[history["player_id"].isin(first_new.index), SERIES_COLUMNS]
+        later = (affected["date"] >= affected["player_id"].map(first_new)).to_numpy()
+        redo = affected.loc[later]
+        context = affected.loc[~later].groupby("player_id").tail(lookback)
+        if not redo.empty:
+            history = history.drop(redo.index)
+
+    combined = pd.concat([context.assign(_new=False), redo.assign(_new=True), rows.assign(_new=True)], ignore_index=True)
+    combined = combined.sort_values(["player_id", "date", "match_id"], kind="stable").reset_index(drop=True)
+
+    # Rolling means from grouped cumulative sums: sum over the window = cumsum - cumsum w rows back
+    by_player = combined.groupby("player_id", sort=False)
+    totals = by_player[FORM_METRICS].cumsum().astype("float64")
+    played = by_player.cumcount().to_numpy() + 1
+    for window in FORM_WINDOWS:
+        previous = totals.groupby(combined["player_id"], sort=False).shift(window).fillna(0)
+        means = (totals - previous).div(np.minimum(played, window), axis=0).clip(lower=0)
+        for metric in FORM_METRICS:
+            combined[f"{metric}_{window}"] = means[metric].astype("float32")
+
+    fresh = combined.loc[combined.pop("_new")]
+    if history is None:
+        return fresh.reset_index(drop=True)
+    return pd.concat([history, fresh], ignore_index=True)
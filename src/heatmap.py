@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from src.charts import pitch_coordinates, pitch_grid, pitch_heatmap, shot_cells
+from src.config import SHOT_MAP_BIN_SIZE
+
+HEATMAP_METRICS = ["Shots", "xG", "Conversion"]
+
+
+class ShotGrid:
+    # Shots, xG and goals per player per pitch cell for one season. Any selection of
+    # players is a sum over rows, so dashboard filters never rescan the raw shots.
+
+    def __init__(self, shots: pd.DataFrame, bin_size=SHOT_MAP_BIN_SIZE):
+        self.rows, self.cols, self.centres_x, self.centres_y = pitch_grid(bin_size)
+        n_cells = self.rows * self.cols
+
+        x, y = pitch_coordinates(shots)
+        inside, cells = shot_cells(x, y, bin_size)
+        self.player_ids, player_rows = np.unique(shots["player_id"].to_numpy(dtype=str)[inside], return_inverse=True)
+        flat = player_rows * n_cells + cells
+        size = len(self.player_ids) * n_cells
+        shape = (len(self.player_ids), n_cells)
+
+        xg = np.nan_to_num(shots["xG"].to_numpy(dtype=float)[inside])
+        goals = (shots["result"].to_numpy() == "Goal")[inside]
+        self.shots = np.bincount(flat, minlength=size).reshape(shape).astype(np.int32)
+        self.xg = np.bincount(flat, weights=xg, minlength=size).reshape(shape).astype(np.float32)
+        self.goals = np.bincount(flat, weights=goals, minlength=size).reshape(shape).astype(np.int32)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def aggregate(self, player_ids):
+        # Rows of the requested players (ids not in the grid are skipped), summed per cell
+        _, positions, _ = np.intersect1d(self.player_ids, np.asarray(player_ids, dtype=str), return_indices=True)
+        shape = (self.rows, self.cols)
+        return (
+            self.shots[positions].sum(axis=0).reshape(shape),
+            self.xg[positions].sum(axis=0).reshape(shape),
+            self.goals[positions].sum(axis=0).reshape(shape),
+        )
+
+
+def create_shot_heatmap(grid: ShotGrid, player_ids, metric="Shots"):
+    shots, xg, goals = grid.aggregate(player_ids)
+    if not shots.any():
+        return None
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        conversion = np.where(shots > 0, goals / shots * 100, np.nan)
+    values = {
+        "Shots": np.where(shots > 0, shots, np.nan),
+        "xG": np.where(shots > 0, xg, np.nan),
+        "Conversion": conversion,
+    }[metric]
+
+    return pitch_heatmap(
+        grid.centres_x,
+        grid.centres_y,
+        values,
+        np.dstack([shots, xg, goals, conversion]),
+        "Shots=%{customdata[0]}<br>xG=%{customdata[1]:.2f}<br>Goals=%{customdata[2]}<br>Conversion=%{customdata[3]:.1f}%<extra></extra>",
+    )
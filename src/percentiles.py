@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+class PercentileEngine:
+    # Sorted, typed reference arrays per metric (and per group), built once per
+    # season snapshot. A percentile is the share of the reference strictly below
+    # the value, found with a binary search instead of a full scan.
+
+    def __init__(self, reference, metrics, group_col=None):
+        self.metrics = list(metrics)
+        self.group_col = group_col
+        self._sorted = {metric: self._sorted_values(reference[metric]) for metric in self.metrics}
+        self._group_sorted = {}
+        if group_col is not None:
+            for group, rows in reference.groupby(group_col, observed=True):
+                self._group_sorted[group] = {metric: self._sorted_values(rows[metric]) for metric in self.metrics}
+
+    @classmethod
+    def from_sorted(cls, metrics, sorted_values, group_sorted=None, group_col=None):
+        # Rebuild from arrays that are already sorted, e.g. memory-mapped from a build artifact
+        engine = cls.__new__(cls)
+        engine.metrics = list(metrics)
+        engine.group_col = group_col
+        engine._sorted = dict(sorted_values)
+        engine._group_sorted = {group: dict(arrays) for group, arrays in (group_sorted or {}).items()}
+        return engine
+
+    def sorted_arrays(self):
+        return self._sorted, self._group_sorted
+
+    @staticmethod
+    def _sorted_values(values):
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.sort(values[~np.isnan(values)])
+
+    @staticmethod
+    def _rank(sorted_values, values):
+        if len(sorted_values) == 0:
+            return np.full(len(values), np.nan)
+        ranks = np.searchsorted(sorted_values, values, side="left") / len(sorted_values) * 100
+        # Nothing is strictly below a missing value
+        return np.where(np.isnan(values), 0.0, np.round(ranks, 1))
+
+    def percentiles(self, rows, metrics=None, group=None):
+        # Percentiles for any number of players at once against the whole reference or one group
+        metrics = self.metrics if metrics is None else list(metrics)
+        arrays = self._sorted if group is None else self._group_sorted[group]
+        return pd.DataFrame(
+            {metric: self._rank(arrays[metric], self._values(rows, metric)) for metric in metrics},
+            index=rows.index,
+        )
+
+    def table(self, df, metrics=None, by_group=False):
+        # Full percentile table for every row in df, optionally ranked within each row's group
+        metrics = self.metrics if metrics is None else list(metrics)
+        if not by_group:
+            return self.percentiles(df, metrics)
+
+        out = pd.DataFrame(np.nan, index=df.index, columns=metrics)
+        groups = df[self.group_col].to_numpy()
+        for group, arrays in self._group_sorted.items():
+            mask = groups == group
+            if mask.any():
+                for metric in metrics:
+                    out.loc[mask, metric] = self._rank(arrays[metric], self._values(df.loc[mask], metric))
+        return out
+
+    @staticmethod
+    def _values(rows, metric):
+        return pd.to_numeric(rows[metric], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
@@ -0,0 +1,77 @@
+import unicodedata
+from bisect import bisect_left
+
+
+# Letters that do not decompose into a base letter plus accent
+TRANSLITERATE = str.maketrans({"ø": "o", "Ø": "O", "æ": "ae", "Æ": "AE", "ß": "ss", "ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ı": "i"})
+
+
+def normalize_name(name):
+    # Case- and accent-insensitive form used for lookups and prefix search
+    decomposed = unicodedata.normalize("NFKD", str(name).translate(TRANSLITERATE))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+class PlayerIndex:
+    # Prebuilt lookups over one season frame: name -> ids, id -> row position and a
+    # sorted prefix index over full names and surnames for the player selectors.
+    # Duplicate names get a "Name (Team)" label so every player stays selectable.
+
+    def __init__(self, df):
+        names = df["player_name"].astype(str).tolist()
+        ids = df["id"].astype(str).tolist()
+        teams = df["current_team"].astype(str).tolist() if "current_team" in df else [""] * len(ids)
+
+        self.id_to_position = {}
+        self.name_to_ids = {}
+        for position, (player_id, name) in enumerate(zip(ids, names)):
+            self.id_to_position.setdefault(player_id, position)
+            self.name_to_ids.setdefault(name, []).append(player_id)
+
+        self.label_to_id = {}
+        for player_id, name, team in zip(ids, names, teams):
+            label = name if len(self.name_to_ids[name]) == 1 else f"{name} ({team})"
+            self.label_to_id.setdefault(label, player_id)
+        self.labels = sorted(self.label_to_id)
+
+        keys = []
+        for label in self.labels:
+            normalized = normalize_name(label)
+            keys.append((normalized, label))
+            for token in normalized.split()[1:]:
+                keys.append((token, label))
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._key_labels = [label for _, label in keys]
+
+    def __len__(self):
+        return len(self.id_to_position)
+
+    def player_id(self, name):
+        # Accepts a plain name (first match, as before) or a disambiguated label
+        if name in self.label_to_id:
+            return self.label_to_id[name]
+        ids = self.name_to_ids.get(name)
+        return ids[0] if ids else None
+
+    def rows(self, df, player_ids):
+        # One take for any number of players, in the order given; unknown ids are skipped
+        positions = [self.id_to_position[str(player_id)] for player_id in player_ids if str(player_id) in self.id_to_position]
+        return df.iloc[positions]
+
+    def search(self, prefix, limit=50):
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return self.labels[:limit]
+
+        matches = []
+        position = bisect_left(self._keys, prefix)
+        while position < len(self._keys) and len(matches) < limit:
+            if not self._keys[position].startswith(prefix):
+                break
+            label = self._key_labels[position]
+            if label not in matches:
+                matches.append(label)
+            position += 1
+        return matches
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import threading
+import time
+
+import aiohttp
+
+from src.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    UNDERSTAT_BACKOFF_BASE,
+    UNDERSTAT_BACKOFF_MAX,
+    UNDERSTAT_BURST,
+    UNDERSTAT_RATE,
+    UNDERSTAT_RETRIES,
+)
+from src.understat import UnderstatClient
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    # Process-wide request budget: `rate` tokens per second, bursting up to `capacity`.
+    # A rate of 0 disables limiting (e.g. when replaying recorded responses).
+
+    def __init__(self, rate=UNDERSTAT_RATE, capacity=UNDERSTAT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        # Returns 0 when a token was taken, otherwise how long to wait for the next one
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures and rejects calls until
+    # `reset_timeout` has passed, then lets exactly one trial call through (half-open)
+    # and keeps rejecting the rest until it resolves. A trial that never reports back
+    # (e.g. cancelled) is replaced by a new one after another `reset_timeout`.
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            now = time.monotonic()
+            probing = self.probe_started is not None and now - self.probe_started < self.reset_timeout
+            if now - self.opened_at < self.reset_timeout or probing:
+                raise CircuitOpenError("Understat circuit is open; serving cached data")
+            self.probe_started = now
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def is_retryable(error):
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+
+def backoff_delay(attempt, base=UNDERSTAT_BACKOFF_BASE, maximum=UNDERSTAT_BACKOFF_MAX):
+    # Full jitter: a random delay up to the capped exponential step
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class ResilientClient(UnderstatClient):
+    # Wraps any client exposing get_json(endpoint) with a shared rate limiter,
+    # jittered exponential retries and a circuit breaker
+
+    def __init__(self, inner, limiter=None, breaker=None, retries=UNDERSTAT_RETRIES):
+        self.inner = inner
+        self.limiter = limiter or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+
+    async def get_json(self, endpoint):
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            await self.limiter.acquire()
+            try:
+                data = await self.inner.get_json(endpoint)
+            except Exception as error:
+                if not is_retryable(error):
+                    # Upstream answered, so the circuit (and any trial call) counts it as healthy
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+            else:
+                self.breaker.record_success()
+                return data
+
+    async def close(self):
+        await self.inner.close()
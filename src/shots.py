@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts import artifact_time, latest_artifact, read_frame
+from src.config import COMPLETED_SEASONS, CURRENT_SEASON, LEAGUE, OFFLINE, SHOT_STORE_REFRESH, SHOT_STORE_SEASONS
+from src.data import get_client, load_season, transform_match_data, transform_shot_data
+from src.form import league_form, match_rows, rolling_form
+from src.store import latest_snapshot, read_snapshot, snapshot_time, write_snapshot
+from src.understat import run_sync
+
+
+def sorted_by_player(table, columns):
+    # Prebuilt artifacts are stored in this order already; indexing the frame itself then
+    # keeps memory-mapped columns shared instead of copying them into a sorted frame
+    if pd.MultiIndex.from_frame(table[columns]).is_monotonic_increasing:
+        return table
+    return table.sort_values(columns, kind="stable").reset_index(drop=True)
+
+
+def player_slices(table):
+    ids = table["player_id"].to_numpy()
+    keys, starts = np.unique(ids, return_index=True)
+    stops = np.append(starts[1:], len(ids))
+    return dict(zip(keys, zip(starts, stops)))
+
+
+class ShotStore:
+    # Every shot for the stored seasons, one frame per season sorted by player then date
+    # so a player's shots in a season are one contiguous slice. Indexed by player_id, match_id
+    # and date (a binary search within the player's date-sorted slice).
+
+    def __init__(self, shots, matches, form=None, series=None):
+        # shots, matches, form and series map a season to its frame
+        self.shots = {}
+        self._player_slices = {}
+        self._match_positions = {}
+        self._dates = {}
+        for season, table in shots.items():
+            if table["player_id"].isna().any():
+                table = table.dropna(subset=["player_id"]).reset_index(drop=True)
+            table = sorted_by_player(table, ["player_id", "date"])
+            self.shots[season] = table
+            self._player_slices[season] = player_slices(table)
+            self._match_positions[season] = table.groupby("match_id").indices
+            self._dates[season] = table["date"].to_numpy()
+
+        self._no_shots = next(iter(self.shots.values())).iloc[0:0]
+
+        self.matches = matches
+        self._no_matches = next(iter(matches.values())).iloc[0:0]
+        self._team_positions = {}
+        for season, table in matches.items():
+            positions = self._team_positions[season] = {}
+            for side in ["h_team", "a_team"]:
+                for team, rows in table.groupby(side).indices.items():
+                    positions.setdefault(team, []).append(rows)
+
+        # Season -> league-wide last-5 form table, indexed by player_id
+        self.form = {season: table.set_index("player_id") for season, table in (form or {}).items()}
+
+        # Season -> rolling form series sorted by player then date, with per-player slices
+        self.series = {}
+        self._series_slices = {}
+        for season, table in (series or {}).items():
+            self.series[season] = sorted_by_player(table, ["player_id", "date", "match_id"])
+            self._series_slices[season] = player_slices(self.series[season])
+
+    def __len__(self):
+        return sum(len(table) for table in self.shots.values())
+
+    def season_shots(self, season):
+        return self.shots.get(str(season), self._no_shots)
+
+    def player_shots(self, player_id, since=None):
+        # Seasons are stored in order, so the player's slices concatenate in date order.
+        # since keeps only shots on or after that date.
+        parts = []
+        for season, table in self.shots.items():
+            start, stop = self._player_slices[season].get(str(player_id), (0, 0))
+            if since is not None and stop > start:
+                start += int(np.searchsorted(self._dates[season][start:stop], np.datetime64(pd.Timestamp(since)), "left"))
+            if stop > start:
+                parts.append(table.iloc[start:stop])
+        if not parts:
+            return self._no_shots
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def match_shots(self, match_id):
+        for season, table in self.shots.items():
+            positions = self._match_positions[season].get(str(match_id))
+            if positions is not None:
+                return table.iloc[positions]
+        return self._no_shots
+
+    def team_matches(self, team_name, season=CURRENT_SEASON):
+        positions = self._team_positions.get(str(season), {}).get(team_name)
+        if not positions:
+            return self._no_matches
+        return self.matches[str(season)].iloc[np.sort(np.concatenate(positions))]
+
+    def form_table(self, season=CURRENT_SEASON):
+        return self.form.get(str(season))
+
+    def form_series(self, player_id, season=CURRENT_SEASON):
+        # None until the season's series has been built; otherwise the player's matches in date order
+        table = self.series.get(str(season))
+        if table is None:
+            return None
+        start, stop = self._series_slices[str(season)].get(str(player_id), (0, 0))
+        return table.iloc[start:stop]
+
+
+def flatten_league_matches(match_data, season):
+    matches = transform_match_data(pd.DataFrame(match_data))
+    if matches.empty:
+        return matches
+    matches["id"] = matches["id"].astype(str)
+    matches["date"] = pd.to_datetime(matches["date"], errors="coerce")
+    matches["isResult"] = matches["isResult"].astype(bool)
+    matches["h_team"] = matches["h"].str["title"]
+    matches["a_team"] = matches["a"].str["title"]
+    matches["season"] = str(season)
+    return matches[["id", "date", "isResult", "h_team", "a_team", "season"]]
+
+
+async def download_match_shots_async(match_ids):
+    # Returns the shots and the ids of the matches that were actually fetched
+    client = get_client()
+    results = await asyncio.gather(*(client.match_shot_data(match_id) for match_id in match_ids), return_exceptions=True)
+
+    shots, fetched = [], []
+    for match_id, result in zip(match_ids, results):
+        # A failed match stays unfetched in the matches snapshot and is retried by the next refresh
+        if isinstance(result, Exception):
+            continue
+        fetched.append(match_id)
+        shots.extend(result.get("h", []) + result.get("a", []))
+    return transform_shot_data(pd.DataFrame(shots)), fetched
+
+
+def fetched_matches(matches, shots):
+    # Ids of the matches whose shots are stored, from the matches snapshot's "fetched" column;
+    # snapshots written before it existed fall back to the matches that have shots
+    if "fetched" in matches:
+        return set(matches.loc[matches["fetched"], "id"])
+    return set(shots["match_id"]) if not shots.empty else set()
+
+
+def stored_matches(matches):
+    # Drops finished matches whose shots are not stored: they would count as goalless for every
+    # player. They join the form tables (and, as new matches, the series) once their shots arrive.
+    if "fetched" not in matches:
+        return matches
+    return matches.loc[matches["fetched"] | ~matches["isResult"]].reset_index(drop=True)
+
+
+def season_complete(season, league=LEAGUE):
+    # Every finished match of the season has its shots stored
+    shot_snapshot = latest_snapshot(league, season, kind="shots")
+    match_snapshot = latest_snapshot(league, season, kind="matches")
+    if shot_snapshot is None or match_snapshot is None:
+        return False
+    matches = read_snapshot(match_snapshot)
+    return "fetched" in matches and bool(matches.loc[matches["isResult"], "fetched"].all())
+
+
+def refresh_shot_store(season, league=LEAGUE):
+    # Incremental: only finished matches whose shots are not stored yet are downloaded.
+    # A completed season makes no upstream calls once every finished match is stored.
+    # Returns the number of matches whose shots were stored by this pass.
+    season = str(season)
+    fetched = []
+    if season not in COMPLETED_SEASONS or not season_complete(season, league):
+        fetched = download_new_matches(season, league)
+
+    # The form tables only change when a match's shots have been stored since the last pass
+    if fetched or latest_snapshot(league, season, kind="form") is None:
+        build_form_table(season, league)
+    if fetched or latest_snapshot(league, season, kind="series") is None:
+        update_form_series(season, league)
+    return len(fetched)
+
+
+def download_new_matches(season, league=LEAGUE):
+    matches = flatten_league_matches(run_sync(get_client().league_match_data(league, season)), season)
+
+    snapshot = latest_snapshot(league, season, kind="shots")
+    shots = read_snapshot(snapshot) if snapshot is not None else pd.DataFrame()
+    match_snapshot = latest_snapshot(league, season, kind="matches")
+    stored = read_snapshot(match_snapshot) if match_snapshot is not None else pd.DataFrame()
+    known = fetched_matches(stored, shots)
+
+    finished = matches.loc[matches["isResult"], "id"] if not matches.empty else []
+    missing = [match_id for match_id in finished if match_id not in known]
+    fetched = []
+    if missing:
+        new_shots, fetched = run_sync(download_match_shots_async(missing))
+        if fetched:
+            # Shots of a match fetched again after an interrupted pass replace the old ones
+            if not shots.empty:
+                shots = shots.loc[~shots["match_id"].isin(fetched)]
+            if not new_shots.empty:
+                new_shots[["id", "player_id", "match_id"]] = new_shots[["id", "player_id", "match_id"]].astype(str)
+            shots = pd.concat([shots, new_shots], ignore_index=True)
+            write_snapshot(shots, league, season, kind="shots")
+
+    if not matches.empty:
+        matches["fetched"] = matches["id"].isin(known | set(fetched))
+    if missing or match_snapshot is None or "fetched" not in stored:
+        write_snapshot(matches, league, season, kind="matches")
+    return fetched
+
+
+def season_players(season, league=LEAGUE):
+    # Form needs the season's players; on a fresh box load_season fetches and snapshots them
+    snapshot = latest_snapshot(league, season)
+    if snapshot is not None:
+        return read_snapshot(snapshot)
+    return load_season(season).data if league == LEAGUE else None
+
+
+def season_frames(season, league=LEAGUE):
+    # Players, shots and matches of one season, or None while any of them is missing
+    paths = [latest_snapshot(league, season, kind) for kind in ["shots", "matches"]]
+    if any(path is None for path in paths):
+        return None
+    players = season_players(season, league)
+    if players is None:
+        return None
+    shots, matches = [read_snapshot(path) for path in paths]
+    return [players, shots, stored_matches(matches)]
+
+
+def build_form_table(season, league=LEAGUE):
+    # Stored next to the season snapshot so pages read form without touching Understat
+    frames = season_frames(season, league)
+    if frames is None:
+        return None
+    players, shots, matches = frames
+    form = league_form(players, shots, matches)
+    write_snapshot(form, league, season, kind="form")
+    return form
+
+
+def update_form_series(season, league=LEAGUE):
+    # Extends the stored rolling series with only the stored finished matches it has not seen
+    # yet; rolling_form recomputes the later rows of a match that arrives late
+    frames = season_frames(season, league)
+    if frames is None:
+        return None
+    players, shots, matches = frames
+
+    snapshot = latest_snapshot(league, season, kind="series")
+    history = read_snapshot(snapshot) if snapshot is not None else None
+    if history is not None and not history.empty:
+        new = matches.loc[matches["isResult"] & ~matches["id"].isin(history["match_id"].unique()), "id"]
+        if new.empty:
+            return history
+        matches = matches.loc[matches["id"].isin(new)]
+        shots = shots.loc[shots["match_id"].isin(new)]
+
+    series = rolling_form(match_rows(players, shots, matches), history)
+    write_snapshot(series, league, season, kind="series")
+    return series
+
+
+def load_shot_store(seasons=SHOT_STORE_SEASONS, league=LEAGUE):
+    shots, matches, form, series = {}, {}, {}, {}
+    for season in seasons:
+        shot_snapshot = latest_snapshot(league, season, kind="shots")
+        match_snapshot = latest_snapshot(league, season, kind="matches")
+        artifact = latest_artifact(league, season)
+        # A prebuilt artifact (src/build.py) wins when it is at least as new as the snapshots
+        if artifact is not None and (shot_snapshot is None or artifact_time(artifact) >= snapshot_time(shot_snapshot)):
+            frames = {name: read_frame(artifact, name) for name in ["shots", "matches", "form", "series"]}
+            if frames["shots"] is not None and frames["matches"] is not None:
+                shots[str(season)] = frames["shots"]
+                matches[str(season)] = frames["matches"]
+                for tables, name in [(form, "form"), (series, "series")]:
+                    if frames[name] is not None:
+                        tables[str(season)] = frames[name]
+                continue
+        if shot_snapshot is None or match_snapshot is None:
+            continue
+        shots[str(season)] = read_snapshot(shot_snapshot)
+        matches[str(season)] = read_snapshot(match_snapshot)
+        form_snapshot = latest_snapshot(league, season, kind="form")
+        if form_snapshot is not None:
+            form[str(season)] = read_snapshot(form_snapshot)
+        series_snapshot = latest_snapshot(league, season, kind="series")
+        if series_snapshot is not None:
+            series[str(season)] = read_snapshot(series_snapshot)
+
+    if not shots:
+        return None
+    return ShotStore(shots, matches, form, series)
+
+
+_store = None
+_store_lock = threading.Lock()
+_refresher = None
+
+
+def get_shot_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_shot_store()
+    return _store
+
+
+def start_background_refresh(seasons=SHOT_STORE_SEASONS, interval=SHOT_STORE_REFRESH):
+    # One refresher thread per process; the new store replaces the old one in a single assignment
+    global _refresher
+    if OFFLINE:
+        return None
+    with _store_lock:
+        if _refresher is not None and _refresher.is_alive():
+            return _refresher
+
+        def refresh_forever():
+            global _store
+            # Reload after the first pass (it may build missing form tables), then only on new matches
+            reload = True
+            while True:
+                for season in seasons:
+                    try:
+                        reload |= refresh_shot_store(season) > 0
+                    except Exception:
+                        # Keep serving the previous store; the next pass retries
+                        continue
+                if reload:
+                    _store = load_shot_store(seasons) or _store
+                reload = False
+                time.sleep(interval)
+
+        _refresher = threading.Thread(target=refresh_forever, name="shot-store-refresh", daemon=True)
+        _refresher.start()
+    return _refresher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the league-wide shot store.")
+    parser.add_argument("--league", default=LEAGUE)
+    parser.add_argument("--season", action="append", dest="seasons", help="Season to build (repeatable)")
+    args = parser.parse_args()
+
+    for season in args.seasons or SHOT_STORE_SEASONS:
+        stored = refresh_shot_store(season, args.league)
+        print(f"{args.league} {season}: shots stored for {stored} new matches")
+
+
+if __name__ == "__main__":
+    main()
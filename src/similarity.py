@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+SIMILARITY_FEATURES = ["xG_per90", "xA_per90", "KP_per90", "shots_per90", "xG_per_shot", "goals_per90", "assists_per90"]
+INFO_COLUMNS = ["id", "player_name", "current_team", "main_position", "time", "season", "league"]
+
+
+class SimilarityEngine:
+    # Standardised per-90 profiles of every candidate (one or many seasons and leagues) as
+    # one float32 matrix, built once per snapshot. A query is a single matrix-vector product
+    # plus argpartition, so it stays in milliseconds with tens of thousands of candidates.
+
+    def __init__(self, players, features=SIMILARITY_FEATURES, min_minutes=0):
+        if min_minutes:
+            players = players.loc[pd.to_numeric(players["time"], errors="coerce").ge(min_minutes).fillna(False)]
+        self.features = list(features)
+        self.players = players[[col for col in INFO_COLUMNS if col in players]].reset_index(drop=True)
+        self.players["id"] = self.players["id"].astype(str)
+
+        values = players[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        self.mean = np.nanmean(values, axis=0) if len(values) else np.zeros(len(self.features))
+        std = np.nanstd(values, axis=0) if len(values) else np.ones(len(self.features))
+        self.std = np.where(std > 0, std, 1.0)
+        # Missing values (no minutes or no shots) sit at the feature mean
+        standardised = np.nan_to_num((values - self.mean) / self.std)
+        self.matrix = np.ascontiguousarray(standardised, dtype=np.float32)
+        self._norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        keys = self.players.get("season", pd.Series([None] * len(self.players))).astype(object).tolist()
+        self._rows = {}
+        for row, (player_id, season) in enumerate(zip(self.players["id"], keys)):
+            self._rows.setdefault((player_id, season), row)
+            self._rows.setdefault((player_id, None), row)
+        self._positions = self.players["main_position"].astype(str).to_numpy() if "main_position" in self.players else None
+        self._ids = self.players["id"].to_numpy()
+
+    def __len__(self):
+        return len(self.players)
+
+    def row(self, player_id, season=None):
+        # Row of a player in one season, or their first row when no season is given
+        return self._rows.get((str(player_id), None if season is None else str(season)))
+
+    def similar(self, player_id, season=None, k=10, same_position=False, exclude_same_player=True):
+        row = self.row(player_id, season)
+        if row is None:
+            return self.players.iloc[0:0].assign(distance=[], similarity=[])
+
+        target = self.matrix[row]
+        # Squared Euclidean distance to every candidate at once
+        distances = self._norms - 2.0 * (self.matrix @ target) + self._norms[row]
+        excluded = self._ids == self._ids[row] if exclude_same_player else np.arange(len(distances)) == row
+        if same_position and self._positions is not None:
+            excluded |= self._positions != self._positions[row]
+        distances[excluded] = np.inf
+
+        k = min(k, int((~excluded).sum()))
+        if k <= 0:
+            return self.players.iloc[0:0].assign(distance=[], similarity=[])
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+
+        result = self.players.iloc[top].copy()
+        result["distance"] = np.sqrt(np.maximum(distances[top], 0.0))
+        result["similarity"] = np.round(100.0 / (1.0 + result["distance"]), 1)
+        return result
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import SNAPSHOT_DIR, SNAPSHOT_KEEP
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def snapshot_paths(league, season, kind="players"):
+    # Newest first; the timestamp suffix sorts lexicographically
+    pattern = f"{kind}_{league}_{season}_*.parquet"
+    return sorted(Path(SNAPSHOT_DIR).glob(pattern), reverse=True)
+
+
+def snapshot_time(path):
+    stamp = Path(path).stem.rsplit("_", 1)[-1]
+    return datetime.strptime(stamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def latest_snapshot(league, season, kind="players"):
+    paths = snapshot_paths(league, season, kind)
+    return paths[0] if paths else None
+
+
+def read_snapshot(path):
+    return pd.read_parquet(path)
+
+
+def write_snapshot(df, league, season, kind="players"):
+    directory = Path(SNAPSHOT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    path = directory / f"{kind}_{league}_{season}_{stamp}.parquet"
+
+    # Write to a temp file first so readers never see a half-written snapshot
+    tmp_path = path.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+
+    for old in snapshot_paths(league, season, kind)[SNAPSHOT_KEEP:]:
+        old.unlink(missing_ok=True)
+
+    return path
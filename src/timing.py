@@ -0,0 +1,159 @@
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import streamlit as st
+
+from src.config import TIMING_ENABLED, TIMING_LOG, TIMING_METRICS_PORT
+
+STAGES = ["fetch", "upstream", "transform", "filter", "percentile", "figure", "render"]
+
+# Spans of the rerun running in this context; None when timing is off for this session
+_rerun = contextvars.ContextVar("timing_rerun", default=None)
+
+# Process-wide totals per (page, stage) for the Prometheus endpoint
+_totals = {}
+_totals_lock = threading.Lock()
+_server = None
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("stage", "rerun", "start")
+
+    def __init__(self, stage, rerun):
+        self.stage = stage
+        self.rerun = rerun
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        page = self.rerun["page"] if self.rerun is not None else "background"
+        if self.rerun is not None:
+            self.rerun["spans"].append((self.stage, seconds))
+        with _totals_lock:
+            count, total = _totals.get((page, self.stage), (0, 0.0))
+            _totals[(page, self.stage)] = (count + 1, total + seconds)
+        return False
+
+
+def span(stage):
+    # A shared no-op unless timing is on, so disabled spans cost one lookup
+    rerun = _rerun.get()
+    if rerun is None and not TIMING_ENABLED:
+        return NOOP_SPAN
+    return _Span(stage, rerun)
+
+
+def start_rerun(page):
+    enabled = TIMING_ENABLED or st.query_params.get("debug") == "1"
+    _rerun.set({"page": page, "start": time.perf_counter(), "spans": []} if enabled else None)
+    if enabled and TIMING_METRICS_PORT:
+        start_metrics_server(TIMING_METRICS_PORT)
+    return enabled
+
+
+def finish_rerun(panel=None):
+    # Closes the rerun, exports it and shows the debug panel: in the sidebar, or in the
+    # container returned by `panel`, which is only called when there is a record to show.
+    # No-op when timing is off.
+    rerun = _rerun.get()
+    if rerun is None:
+        return None
+    _rerun.set(None)
+
+    total = time.perf_counter() - rerun["start"]
+    record = {
+        "ts": time.time(),
+        "page": rerun["page"],
+        "total_ms": round(total * 1000, 3),
+        "spans": [{"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in rerun["spans"]],
+    }
+    if TIMING_LOG:
+        with open(TIMING_LOG, "a") as log:
+            log.write(json.dumps(record) + "\n")
+
+    render_debug_panel(record, st.sidebar if panel is None else panel())
+    return record
+
+
+@contextmanager
+def fragment_rerun(page, fragment):
+    # Inside a full rerun a fragment's spans belong to that rerun. When only the fragment
+    # reruns it is timed on its own, with the panel inside the fragment: fragments cannot
+    # write to the sidebar.
+    if _rerun.get() is not None:
+        yield
+        return
+    start_rerun(f"{page}:{fragment}")
+    try:
+        yield
+    finally:
+        finish_rerun(panel=st.container)
+
+
+def render_debug_panel(record, panel):
+    spans = pd.DataFrame(record["spans"], columns=["stage", "ms"])
+    by_stage = spans.groupby("stage", sort=False)["ms"].agg(["count", "sum"]).rename(columns={"sum": "ms"})
+
+    with panel:
+        st.markdown("---")
+        st.markdown("### Debug: rerun timings")
+        st.caption(f"Total {record['total_ms']:.1f} ms across {len(spans)} spans")
+        st.dataframe(by_stage.round(2), use_container_width=True)
+        with st.expander("All spans"):
+            st.dataframe(spans.round(2), use_container_width=True, hide_index=True)
+
+
+def prometheus_text():
+    lines = [
+        "# HELP premstats_stage_seconds Time spent per page and stage",
+        "# TYPE premstats_stage_seconds summary",
+    ]
+    with _totals_lock:
+        totals = sorted(_totals.items())
+    for (page, stage), (count, seconds) in totals:
+        labels = f'page="{page}",stage="{stage}"'
+        lines.append(f"premstats_stage_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"premstats_stage_seconds_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        return None
+
+
+def start_metrics_server(port):
+    # Local-only /metrics endpoint, started once per process
+    global _server
+    with _totals_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="timing-metrics", daemon=True).start()
+    return _server
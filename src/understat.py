@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import aiohttp
+
+from src.config import UNDERSTAT_MAX_CONCURRENCY, UNDERSTAT_MAX_CONNECTIONS, UNDERSTAT_TIMEOUT
+
+BASE_URL = "https://understat.com/"
+# Understat serves its data as JSON to AJAX requests (the same endpoints understatapi uses)
+AJAX_HEADERS = {"X-Requested-With": "XMLHttpRequest"}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    # One long-lived event loop per process, so pooled connections survive across reruns
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="understat-loop", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+class UnderstatClient:
+    def __init__(
+        self,
+        max_connections=UNDERSTAT_MAX_CONNECTIONS,
+        max_concurrency=UNDERSTAT_MAX_CONCURRENCY,
+        timeout=UNDERSTAT_TIMEOUT,
+    ):
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+
+    async def get_json(self, endpoint):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                base_url=BASE_URL,
+                connector=connector,
+                headers=AJAX_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            async with self._session.get(endpoint) as res:
+                res.raise_for_status()
+                return await res.json(content_type=None)
+
+    async def league_player_data(self, league, season):
+        data = await self.get_json(f"getLeagueData/{league}/{season}")
+        return data.get("players", [])
+
+    async def league_match_data(self, league, season):
+        data = await self.get_json(f"getLeagueData/{league}/{season}")
+        return data.get("dates", [])
+
+    async def player_shot_data(self, player_id):
+        data = await self.get_json(f"getPlayerData/{player_id}")
+        return data.get("shots", [])
+
+    async def team_match_data(self, team_name, season):
+        data = await self.get_json(f"getTeamData/{team_name}/{season}")
+        return data.get("dates", [])
+
+    async def match_shot_data(self, match_id):
+        data = await self.get_json(f"getMatchData/{match_id}")
+        return data.get("shots", {})
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src import artifacts
+from src.artifacts import artifact_time, latest_artifact, read_frame, write_artifact
+from src.charts import filter_shots
+from src.percentiles import PercentileEngine
+from src.shots import ShotStore
+
+PLAYERS = pd.DataFrame({"id": ["1", "2", "3"], "xG": [0.5, 1.5, 3.0], "main_position": ["FWD", "FWD", "MID"]})
+
+
+def season_shots(season, player_ids, days):
+    dates = pd.Timestamp(f"{season}-08-16") + pd.to_timedelta(days, unit="D")
+    return pd.DataFrame({
+        "player_id": player_ids,
+        "date": dates,
+        "match_id": [f"{season}{day}" for day in days],
+        "xG": np.linspace(0.1, 0.5, len(days)),
+        "season": season,
+    })
+
+
+def matches(season):
+    return pd.DataFrame({"id": [f"{season}0"], "date": [pd.Timestamp(f"{season}-08-16")], "isResult": [True], "h_team": ["A"], "a_team": ["B"], "season": [season]})
+
+
+def test_builds_within_the_same_second_get_their_own_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", tmp_path)
+    percentiles = PercentileEngine(PLAYERS, ["xG"], group_col="main_position")
+
+    paths = [write_artifact("EPL", "2025", {"players": PLAYERS}, percentiles) for _ in range(3)]
+
+    assert len({path.name for path in paths}) == 3
+    assert len({artifact_time(path) for path in paths}) <= 2
+    assert latest_artifact("EPL", "2025") == paths[-1]
+    assert read_frame(paths[-1], "players")["id"].tolist() == ["1", "2", "3"]
+
+
+def test_shot_store_indexes_sorted_season_frames_in_place():
+    shots = {"2024": season_shots("2024", ["1", "1", "2"], [0, 7, 3]), "2025": season_shots("2025", ["2", "1"], [5, 0])}
+    shots["2025"] = shots["2025"].sort_values(["player_id", "date"]).reset_index(drop=True)
+    store = ShotStore(shots, {"2024": matches("2024"), "2025": matches("2025")})
+
+    assert store.season_shots("2024") is shots["2024"]
+    assert store.season_shots("2025") is shots["2025"]
+    assert store.player_shots("1")["match_id"].tolist() == ["20240", "20247", "20250"]
+    assert store.player_shots("2").iloc[0]["match_id"] == "20243"
+    assert store.player_shots("9").empty
+    assert store.team_matches("A", "2025")["id"].tolist() == ["20250"]
+    assert len(store) == 5
+
+
+def test_shot_store_sorts_unsorted_season_frames():
+    shots = season_shots("2025", ["2", "1", "1"], [3, 7, 0])
+    store = ShotStore({"2025": shots}, {"2025": matches("2025")})
+
+    assert store.season_shots("2025") is not shots
+    assert store.player_shots("1")["match_id"].tolist() == ["20250", "20257"]
+
+
+def test_shot_store_date_lookup_matches_a_date_mask():
+    shots = season_shots("2025", ["1"] * 6 + ["2"] * 3, [0, 20, 40, 60, 80, 100, 10, 50, 90])
+    store = ShotStore({"2025": shots}, {"2025": matches("2025")})
+    since = pd.Timestamp("2025-10-25")
+
+    for player_id in ["1", "2"]:
+        everything = store.player_shots(player_id)
+        expected = everything[everything["date"] >= since]
+        assert store.player_shots(player_id, since=since)["match_id"].tolist() == expected["match_id"].tolist()
+    assert store.player_shots("1", since="2027-01-01").empty
+
+    # filter_shots cuts sorted slices by binary search and unsorted frames by mask, with the same result
+    today = since + pd.DateOffset(months=6)
+    sorted_cut, _ = filter_shots(store.player_shots("1"), "Last 6 months", today=today)
+    masked_cut, _ = filter_shots(store.player_shots("1").iloc[::-1], "Last 6 months", today=today)
+    assert sorted_cut["match_id"].tolist() == masked_cut["match_id"].tolist()[::-1] == ["202580", "2025100"]
@@ -0,0 +1,12 @@
+from src.backends import SyntheticLeague
+
+
+def test_match_ids_resolve_to_their_season_in_a_large_league():
+    # 330 teams play 108,570 matches a season, more than the old per-season id range
+    league = SyntheticLeague(teams=330, shots_per_match=1, seasons=["2024", "2025"], finished_ratio=1.0)
+    match_id = int(league.season("2024")["matches"]["id"].max())
+
+    shots = league.payload(f"getMatchData/{match_id}")["shots"]
+    assert {shot["season"] for shot in shots["h"] + shots["a"]} <= {"2024"}
+    assert {int(shot["match_id"]) for shot in shots["h"] + shots["a"]} <= {match_id}
+    assert shots["h"] + shots["a"]
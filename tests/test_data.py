@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from src.data import coerce_league_data, freeze_frame
+
+
+def test_invalid_and_missing_counts_stay_missing():
+    raw = pd.DataFrame({
+        "id": ["1", "2", "3", "4", "5"],
+        "player_name": ["a", "b", "c", "d", "e"],
+        "time": ["270", None, "40000", "-5", "12.5"],
+        "red_cards": ["0", "1", "300", "0", "0"],
+        "xG": ["0.5", None, "1", "1", "1"],
+    })
+    coerced = coerce_league_data(raw)
+
+    assert str(coerced["time"].dtype) == "Int16"
+    assert coerced["time"].tolist()[0] == 270
+    assert coerced["time"].isna().tolist() == [False, True, True, True, True]
+    assert coerced["red_cards"].isna().tolist() == [False, False, True, False, False]
+    assert coerced["xG"].isna().tolist() == [False, True, False, False, False]
+
+
+def test_frozen_frame_rejects_writes_to_nullable_counts():
+    frame = freeze_frame(pd.DataFrame({"time": pd.array([90, None], dtype="Int16"), "xG": [0.1, 0.2]}))
+
+    assert str(frame["time"].dtype) == "Int16"
+    for column in ["time", "xG"]:
+        with pytest.raises(ValueError):
+            frame.loc[0, column] = 5
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from src import data, resilience
+from src.cache import TTLCache
+from src.fake_client import FakeUnderstatClient
+from src.resilience import CircuitBreaker, CircuitOpenError, ResilientClient, TokenBucket
+
+SHOTS = {"getPlayerData/1": {"shots": [{"id": "10", "xG": "0.3", "minute": "12", "X": "0.9", "Y": "0.5", "date": "2025-08-16 15:00:00"}]}}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0)
+
+
+def make_client(fake, failure_threshold=5, reset_timeout=30, retries=2):
+    return ResilientClient(fake, limiter=TokenBucket(rate=0), breaker=CircuitBreaker(failure_threshold, reset_timeout), retries=retries)
+
+
+def test_retries_then_raises_while_upstream_fails():
+    fake = FakeUnderstatClient(latency=0, error_rate=1)
+    client = make_client(fake, retries=2)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(client.get_json("getPlayerData/1"))
+    assert fake.calls == 3
+    assert client.breaker.failures == 3
+
+
+def test_retry_succeeds_once_upstream_recovers():
+    fake = FakeUnderstatClient(responses=SHOTS, latency=0, error_rate=1)
+    client = make_client(fake, retries=3)
+
+    async def recover_after_first_call():
+        task = asyncio.ensure_future(client.get_json("getPlayerData/1"))
+        while fake.calls == 0:
+            await asyncio.sleep(0)
+        fake.error_rate = 0
+        return await task
+
+    assert asyncio.run(recover_after_first_call()) == SHOTS["getPlayerData/1"]
+    assert client.breaker.state == "closed"
+    assert client.breaker.failures == 0
+
+
+def test_non_retryable_errors_are_not_retried():
+    fake = FakeUnderstatClient(latency=0, error_rate=1, error_status=404)
+    client = make_client(fake)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(client.get_json("getPlayerData/1"))
+    assert fake.calls == 1
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_and_rejects_without_calling_upstream():
+    fake = FakeUnderstatClient(latency=0, error_rate=1)
+    client = make_client(fake, failure_threshold=2, retries=1)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(client.get_json("getPlayerData/1"))
+    assert client.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.get_json("getPlayerData/1"))
+    assert fake.calls == 2
+
+
+def test_half_open_lets_a_single_trial_call_through():
+    fake = FakeUnderstatClient(responses=SHOTS, latency=0.05, error_rate=1)
+    client = make_client(fake, failure_threshold=1, reset_timeout=0.1, retries=0)
+
+    async def trial_after_reset():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.get_json("getPlayerData/1")
+        await asyncio.sleep(0.15)
+        assert client.breaker.state == "half-open"
+        fake.error_rate = 0
+        return await asyncio.gather(*(client.get_json("getPlayerData/1") for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(trial_after_reset())
+    assert fake.calls == 2
+    assert sum(isinstance(result, CircuitOpenError) for result in results) == 4
+    assert client.breaker.state == "closed"
+
+
+def test_failed_trial_call_reopens_the_circuit():
+    fake = FakeUnderstatClient(latency=0, error_rate=1)
+    client = make_client(fake, failure_threshold=1, reset_timeout=0.1, retries=0)
+
+    async def failed_trial():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.get_json("getPlayerData/1")
+        await asyncio.sleep(0.15)
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.get_json("getPlayerData/1")
+
+    asyncio.run(failed_trial())
+    assert client.breaker.state == "open"
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    fake = FakeUnderstatClient(responses=SHOTS, latency=0)
+    monkeypatch.setattr(data, "_client", make_client(fake, failure_threshold=2, retries=1))
+    # Entries expire immediately, so every fetch goes upstream and only get_stale can serve them
+    monkeypatch.setattr(data, "shot_cache", TTLCache(ttl=0))
+    return fake
+
+
+def test_shot_fetch_serves_the_stale_copy_while_upstream_fails(fake_upstream):
+    fresh = asyncio.run(data.load_player_shot_data_async("1"))
+    assert fresh["xG"].tolist() == [0.3]
+
+    fake_upstream.error_rate = 1
+    stale = asyncio.run(data.load_player_shot_data_async("1"))
+    assert stale is fresh
+    assert data.get_client().breaker.state == "open"
+
+    # The open circuit answers without touching upstream and the stale copy is still served
+    calls = fake_upstream.calls
+    assert asyncio.run(data.load_player_shot_data_async("1")) is fresh
+    assert fake_upstream.calls == calls
+
+
+def test_shot_fetch_raises_without_a_stale_copy(fake_upstream):
+    fake_upstream.error_rate = 1
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(data.load_player_shot_data_async("1"))
+
+
+def test_shot_fetch_recovers_after_the_circuit_resets(fake_upstream):
+    data.get_client().breaker.reset_timeout = 0.1
+    fake_upstream.error_rate = 1
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(data.load_player_shot_data_async("1"))
+    assert data.get_client().breaker.state == "open"
+
+    fake_upstream.error_rate = 0
+    asyncio.run(asyncio.sleep(0.15))
+    recovered = asyncio.run(data.load_player_shot_data_async("1"))
+    assert recovered["xG"].tolist() == [0.3]
+    assert data.get_client().breaker.state == "closed"
+
+
+def test_fetch_concurrently_reports_failures_and_timeouts(fake_upstream):
+    fake_upstream.error_rate = 1
+
+    def slow():
+        time.sleep(0.5)
+
+    calls = {"ok": (len, "abc"), "slow": (slow,), "upstream": (data.load_player_shot_data_async, "1")}
+    results, failures = data.fetch_concurrently(calls, timeout=0.2)
+    assert results == {"ok": 3}
+    assert isinstance(failures["slow"], TimeoutError)
+    assert isinstance(failures["upstream"], aiohttp.ClientResponseError)
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from src import data, shots, store
+from src.backends import SyntheticLeague
+from src.data import transform_league_data
+from src.form import match_rows, rolling_form
+from src.fake_client import FakeUnderstatClient
+from src.resilience import CircuitBreaker, ResilientClient, TokenBucket
+from src.shots import refresh_shot_store, season_complete, season_frames
+from src.store import latest_snapshot, read_snapshot, write_snapshot
+
+SEASON = "2024"
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    # A small completed season served by the fake client; only match downloads fail
+    league = SyntheticLeague(teams=6, shots_per_match=8, seasons=[SEASON], finished_ratio=1.0)
+    responses = {f"getLeagueData/EPL/{SEASON}": league.payload(f"getLeagueData/EPL/{SEASON}")}
+    for match_id in league.season(SEASON)["matches"]["id"]:
+        responses[f"getMatchData/{match_id}"] = league.payload(f"getMatchData/{match_id}")
+    fake = FakeUnderstatClient(responses, latency=0, error_prefix="getMatchData/", seed=1)
+
+    monkeypatch.setattr(store, "SNAPSHOT_DIR", tmp_path)
+    monkeypatch.setattr(shots, "COMPLETED_SEASONS", [SEASON])
+    monkeypatch.setattr(data, "_client", ResilientClient(fake, limiter=TokenBucket(rate=0), breaker=CircuitBreaker(1000, 30), retries=0))
+    players = transform_league_data(pd.DataFrame(responses[f"getLeagueData/EPL/{SEASON}"]["players"]))
+    write_snapshot(players, "EPL", SEASON)
+    return league, fake
+
+
+def test_completed_season_is_retried_until_every_match_is_stored(upstream):
+    league, fake = upstream
+    finished = int(league.season(SEASON)["matches"]["isResult"].sum())
+
+    fake.error_rate = 0.4
+    first = refresh_shot_store(SEASON)
+    assert 0 < first < finished
+    assert not season_complete(SEASON)
+
+    fake.error_rate = 0
+    second = refresh_shot_store(SEASON)
+    assert first + second == finished
+    assert season_complete(SEASON)
+
+    # Once complete, the season makes no more upstream calls
+    calls = fake.calls
+    assert refresh_shot_store(SEASON) == 0
+    assert fake.calls == calls
+
+    stored = read_snapshot(latest_snapshot("EPL", SEASON, kind="shots"))
+    expected = league.season(SEASON)["shots"]
+    assert len(stored) == len(expected)
+    assert sorted(stored["id"]) == sorted(expected["id"].astype(str))
+
+
+def test_form_series_matches_a_full_rebuild_after_late_matches(upstream):
+    league, fake = upstream
+    # Failed matches are spread over the season, so they arrive after later-dated ones are in the series
+    fake.error_rate = 0.4
+    refresh_shot_store(SEASON)
+    fake.error_rate = 0
+    refresh_shot_store(SEASON)
+
+    incremental = read_snapshot(latest_snapshot("EPL", SEASON, kind="series"))
+    full = rolling_form(match_rows(*season_frames(SEASON)))
+
+    def ordered(series):
+        return series.sort_values(["player_id", "match_id"]).reset_index(drop=True)
+
+    assert len(incremental) == len(full)
+    pd.testing.assert_frame_equal(ordered(incremental), ordered(full[incremental.columns]), check_dtype=False, atol=1e-5)